@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(items):
+    """Tests named test_..._benchmark or test_..._slow are marked slow here,
+    so modules don't need pytest imported to mark them. Solutions import
+    these modules and pytest takes a few hundred ms to import."""
+    for item in items:
+        if getattr(item, "originalname", item.name).endswith(("benchmark", "_slow")):
+            item.add_marker(pytest.mark.slow)
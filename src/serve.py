@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime as dt
+from importlib import import_module, reload
+from pathlib import Path
+
+SRC = Path(__file__).parent.resolve()
+DEFAULT_SOCKET = Path(tempfile.gettempdir()) / f"aoc_python-{os.getuid()}.sock"
+
+
+def init_argparse() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        usage="%(prog)s [--socket {path}] [-y {year} -d {day} [-p {part}]]",
+        description="Keep Advent Of Code solutions imported in a server process. "
+        "Without --year start the server, with --year ask it to solve a day.",
+    )
+    parser.add_argument(
+        "-y",
+        "--year",
+        type=int,
+    )
+    parser.add_argument(
+        "-d",
+        "--day",
+        type=int,
+    )
+    parser.add_argument(
+        "-p",
+        "--part",
+        type=int,
+        choices=[1, 2],
+        help="solve only this part",
+    )
+    parser.add_argument("-i", "--input", type=str, help="filepath for input file")
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=os.environ.get("AOC_SOCKET", str(DEFAULT_SOCKET)),
+        help="unix socket path (default $AOC_SOCKET or a file in temp dir)",
+    )
+    parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="stop a running server",
+    )
+    return parser
+
+
+class ModuleReloader:
+    """Reloads modules from src whose files changed since they were loaded"""
+
+    def __init__(self):
+        self.mtimes = {}
+
+    def local_modules(self):
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name == "__main__" or path is None:
+                continue
+            path = Path(path).resolve()
+            if path.is_relative_to(SRC):
+                yield name, module, path
+
+    def reload_changed(self):
+        changed = []
+        days = []
+        for name, module, path in self.local_modules():
+            mtime = path.stat().st_mtime if path.exists() else None
+            if self.mtimes.setdefault(name, mtime) != mtime:
+                changed.append(name)
+            if name.startswith("year"):
+                days.append(name)
+        if not changed:
+            return []
+        # days hold references to util classes, reload them after util
+        utils = [name for name in changed if not name.startswith("year")]
+        to_reload = utils + (days if utils else changed)
+        for name in to_reload:
+            reload(sys.modules[name])
+        for name, module, path in self.local_modules():
+            self.mtimes[name] = path.stat().st_mtime
+        return to_reload
+
+
+class SolveHandler(socketserver.StreamRequestHandler):
+    """Handles one json line request:
+    {"year": 2024, "day": 1, "part": 1, "input": "optional input text"}
+    and responds with {"answer": ..., "time": ...} or {"error": ...}"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.solve(request)
+        except Exception as e:
+            response = dict(error=f"{type(e).__name__}: {e}")
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class SolveServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path):
+        super().__init__(str(socket_path), SolveHandler)
+        self.reloader = ModuleReloader()
+
+    def solve(self, request):
+        # imported here so that the client does not pay for it
+        from solve import get_input, run_part
+
+        if not isinstance(request, dict):
+            raise ValueError(f"Request should be a json object, got {request!r}")
+        if request.get("stop"):
+            # shutdown waits for the serving loop so it can't run in this thread
+            threading.Thread(target=self.shutdown).start()
+            return dict(answer="stopped", time=0)
+        reloaded = self.reloader.reload_changed()
+        if reloaded:
+            print(f"Reloaded {', '.join(reloaded)}")
+        year, day, part = (request.get(key) for key in ("year", "day", "part"))
+        if not all(type(n) is int for n in (year, day, part)) or part not in (1, 2):
+            raise ValueError(
+                f"Request needs integer year and day and part 1 or 2, got {request}"
+            )
+        content = request.get("input")
+        if content is None:
+            content = get_input(year, day)
+        solution = import_module(f"year{year}.day{day:02d}")
+        self.reloader.reload_changed()  # start tracking newly imported modules
+        answer, t = run_part(year, day, part, content)
+        print(f"Year {year} Day {day} Part {part}: {answer} ({t:.3f} s)")
+        return dict(answer=str(answer), time=t, title=solution.day_title)
+
+
+def serve(socket_path):
+    socket_path = Path(socket_path)
+    if socket_path.exists():
+        socket_path.unlink()
+    with SolveServer(socket_path) as server:
+        print(f"Serving on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def ask_server(socket_path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(socket_path))
+        s.sendall((json.dumps(request) + "\n").encode())
+        with s.makefile("r") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError(f"No response from server at {socket_path}")
+    return json.loads(line)
+
+
+def solve_remote(socket_path, year, day, part, content=None):
+    """Ask the server to solve a part, return answer and time"""
+    request = dict(year=year, day=day, part=part, input=content)
+    response = ask_server(socket_path, request)
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["answer"], response["time"]
+
+
+if __name__ == "__main__":
+    parser = init_argparse()
+    args = parser.parse_args()
+    solving = args.year is not None or args.day is not None
+    if solving and args.day is None:
+        parser.error("--day is needed to solve, leave out --year to serve")
+    if not solving and (args.part is not None or args.input is not None):
+        parser.error("--part and --input need --day")
+
+    if not solving and not args.stop:
+        serve(args.socket)
+    else:
+        content = None
+        if args.input is not None:
+            with open(args.input, "r") as f:
+                content = f.read().rstrip()
+        try:
+            if args.stop:
+                ask_server(args.socket, dict(stop=True))
+            else:
+                year = args.year if args.year is not None else dt.now().year
+                parts = [args.part] if args.part is not None else [1, 2]
+                t0 = time.perf_counter()
+                for part in parts:
+                    answer, t = solve_remote(args.socket, year, args.day, part, content)
+                    print(f"Part {part}: {answer} ({t:.3f} s)")
+                print(f"Wall time: {time.perf_counter() - t0:.3f}s")
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"No server at {args.socket}, start it with python src/serve.py")
+            sys.exit(1)
+        except (ConnectionError, RuntimeError) as e:
+            print(e)
+            sys.exit(1)
+
+
+def test_server(tmp_path):
+    socket_path = tmp_path / "aoc.sock"
+    server = SolveServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        answer, t = solve_remote(socket_path, 2024, 1, 1, "3 4\n4 3\n2 5")
+        assert answer == "3"
+        answer, t = solve_remote(socket_path, 2024, 1, 2, "3 4\n4 3\n2 5")
+        assert answer == "7"
+        # bad requests get an error and the server keeps going
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(str(socket_path))
+            s.sendall(b"not json\n")
+            assert "error" in json.loads(s.makefile("r").readline())
+        for request in ([2024, 1, 1], dict(year=2024, day=None, part=1)):
+            assert "error" in ask_server(socket_path, request)
+        assert solve_remote(socket_path, 2024, 1, 1, "1 1")[0] == "0"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -1,13 +1,40 @@
 import argparse
+import inspect
+import os
+import resource
+import subprocess
+import sys
 import time
-from aocd import get_data, submit
+from concurrent.futures import Future, TimeoutError
 from datetime import datetime as dt
+from functools import partial
 from importlib import import_module
+from pathlib import Path
+from pebble import ProcessPool, ProcessExpired
+from util.benchmark import timed
+from util.answer_cache import AnswerCache, MISSING
+from util.input_store import InputStore, MissingInputError
+from util.lazy import lazy_import, load_lazy
+from util.profiling import MODES, profile
+
+# aocd takes a while to import and is not needed to solve a given input file
+aocd = lazy_import("aocd")
+
+YEARS = [2015, 2023, 2024, 2025]
+# status of a part that did not give an answer in a worker
+TIMEOUT = "TIMEOUT"
+OOM = "OOM"
+ERROR = "ERROR"
+# answer of parts of days skipped because their input is missing
+NO_INPUT = "NO INPUT"
+
+# memory limit (MB) of this worker process, set by limit_memory
+memory_limit = None
 
 
 def init_argparse() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
-        usage="%(prog)s [-y {year}] [-d {day}] [--input {filepath}]",
+        usage="%(prog)s [-y {year}] [-d {day}] [--input {filepath}] [-j {jobs}]",
         description="Solve Advent Of Code puzzles.",
     )
     parser.add_argument(
@@ -26,57 +53,453 @@ def init_argparse() -> argparse.ArgumentParser:
         type=int,
     )
     parser.add_argument("-i", "--input", type=str, help="filepath for input file")
+    parser.add_argument(
+        "--input-dir",
+        type=str,
+        default=os.environ.get("AOC_INPUTS"),
+        help="directory with {year}/day{NN}.txt inputs, downloaded inputs are "
+        "saved there too (default $AOC_INPUTS)",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="never download inputs, days missing from --input-dir are skipped "
+        "and make the exit status 1",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="solve parts in a pool of this many worker processes",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="processes for parts that can split their work over many "
+        "(parts with a workers argument), 0 for every CPU (default 1)",
+    )
+    parser.add_argument(
+        "--all-years",
+        action="store_true",
+        help=f"solve every day of years {', '.join(map(str, YEARS))}",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        help="kill a part that runs longer than this many seconds",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-rss",
+        type=int,
+        help="kill a part that maps more than this many MB of memory, "
+        "counting shared libraries (address space, larger than RSS)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        nargs="?",
+        const=".aoc_cache",
+        default=os.environ.get("AOC_CACHE"),
+        metavar="DIR",
+        help="reuse answers saved in DIR (default .aoc_cache or $AOC_CACHE) "
+        "while the input and solution code are the same",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="don't use the answer cache even if $AOC_CACHE is set",
+    )
+    parser.add_argument(
+        "--cache-clear",
+        action="store_true",
+        help="delete saved answers before solving",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=MODES,
+        help="profile parts of the given day, reports go to outputs/profiles",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="show this many hot functions when profiling (default 10)",
+    )
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="also measure cold import of day modules with python -X importtime",
+    )
     return parser
 
 
-def run_day(year, day, input_path=None, submit_answer=0):
+def get_input(year, day, input_path=None, store=None, offline=False):
+    """Read input from a file, an InputStore or download it with aocd.
+    Downloaded inputs are added to the store."""
+    if input_path is not None:
+        with open(input_path, "r") as f:
+            return f.read().rstrip()
+    if store is not None:
+        content = store.get(year, day)
+        if content is not None:
+            return content
+    if offline:
+        where = f" in {store.root}" if store is not None else ""
+        raise MissingInputError(f"No input for year {year} day {day}{where}")
+    content = aocd.get_data(year=year, day=day, block=True)
+    if store is not None:
+        store.put(year, day, content)
+    return content
+
+
+def import_day(year, day):
+    """Import a day module, return it and time spent importing.
+    Libraries that were already imported by previous days are not counted."""
+    t0 = time.perf_counter()
+    solution = import_module(f"year{year}.day{day:02d}")
+    t1 = time.perf_counter()
+    return solution, t1 - t0
+
+
+def measure_cold_import(year, day, top=3):
+    """Import a day module in a fresh interpreter with -X importtime.
+    Return total import time, the heaviest imports made by the module and
+    names and time of the lazy modules it loads on first use."""
+    name = f"year{year}.day{day:02d}"
+    code = (
+        f"import sys, time, {name}\n"
+        "from util.lazy import load_lazy\n"
+        "t0 = time.perf_counter()\n"
+        f"names = load_lazy(sys.modules['{name}'])\n"
+        "print(time.perf_counter() - t0, *names)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    # lines look like "import time:   self [us] |  cumulative |   nested.name"
+    # the more spaces before the name the deeper the import is nested
+    imports = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        level = len(module) - len(module.lstrip())
+        imports.append((level, module.strip(), int(cumulative) / 1e6))
+    found = [(lv, t) for lv, module, t in imports if module == name]
+    if not found:
+        # import failed, the error is in out.stderr
+        return None, [], ([], None)
+    first_use_time, *first_use = out.stdout.split()
+    level, total = found[-1]
+    children = []
+    for lv, module, t in reversed(imports[: imports.index((level, name, total))]):
+        if lv <= level:
+            break
+        if lv == level + 2:
+            children.append((module, t))
+    heaviest = sorted(children, key=lambda mt: -mt[1])[:top]
+    return total, heaviest, (first_use, float(first_use_time))
+
+
+def format_first_use(names, t):
+    """Part of the import line for lazy modules loaded before timing parts"""
+    if not names:
+        return ""
+    return f", first use of {', '.join(names)} {format_time(t)}"
+
+
+def run_part(year, day, part, content, disable_gc=False, workers=1):
+    """Solve one part of a day, return answer and time spent.
+    Parts with a workers argument get workers (None for every CPU).
+    Lazy imports are done before timing, they are not part of the time.
+    Top level function so that it can be sent to a worker process."""
     try:
         solution = import_module(f"year{year}.day{day:02d}")
+        load_lazy(solution)
+        func = solution.part1 if part == 1 else solution.part2
+        if workers != 1 and "workers" in inspect.signature(func).parameters:
+            func = partial(func, workers=workers)
+        return timed(func, content, disable_gc=disable_gc)
+    except ImportError as e:
+        # under a memory limit libraries like numpy fail to map their
+        # shared objects and that comes out as an ImportError
+        if memory_limit is None or isinstance(e, ModuleNotFoundError):
+            raise
+        raise MemoryError(f"import failed under {memory_limit} MB: {e}") from e
+
+
+def limit_memory(max_rss_mb):
+    """Worker initializer that caps memory of the worker process.
+    RLIMIT_RSS is not enforced on Linux so address space is limited instead,
+    which is larger than RSS: shared libraries count in full."""
+    global memory_limit
+    if max_rss_mb is not None:
+        memory_limit = max_rss_mb
+        limit = max_rss_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def make_pool(jobs=1, max_rss=None):
+    # with a memory limit every part gets a fresh worker, so that memory
+    # held by a previous part doesn't count against the next one
+    return ProcessPool(
+        max_workers=jobs,
+        max_tasks=0 if max_rss is None else 1,
+        initializer=limit_memory,
+        initargs=(max_rss,),
+    )
+
+
+def collect_result(future):
+    """Get answer, time and status of a scheduled part. Status is None for
+    an answer, TIMEOUT or OOM for parts that hit a limit and ERROR for parts
+    that raised. Without an answer time is None and answer is the status,
+    or the exception for ERROR."""
+    try:
+        answer, t = future.result()
+        return answer, t, None
+    except TimeoutError:
+        return TIMEOUT, None, TIMEOUT
+    except (MemoryError, ProcessExpired):
+        # a worker killed by a signal most likely ran out of memory too
+        return OOM, None, OOM
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", None, ERROR
+
+
+def format_time(t, timeout=None, status=None):
+    if t is not None:
+        return f"{t:.3f} s"
+    if status == TIMEOUT:
+        return f"> {timeout} s"
+    if status == OOM:
+        return "over memory limit"
+    if status == ERROR:
+        return "failed"
+    return "-"
+
+
+def run_day(
+    year,
+    day,
+    input_path=None,
+    submit_answer=0,
+    importtime=False,
+    store=None,
+    offline=False,
+    cache=None,
+    workers=1,
+):
+    try:
+        solution, import_time = import_day(year, day)
     except ModuleNotFoundError:
         return "?", (0, 0)
     print(f"--- Year {year} Day {day}: {solution.day_title} ---")
-    if input_path is None:
-        content = get_data(year=year, day=day, block=True)
+    # libraries the day imports lazily are loaded here instead of in part 1
+    first_use, first_use_time = timed(load_lazy, solution)
+    first_use = format_first_use(first_use, first_use_time)
+    if importtime:
+        cold_time, heaviest, cold_first_use = measure_cold_import(year, day)
+        details = ", ".join(f"{module} {t:.3f} s" for module, t in heaviest)
+        details += format_first_use(*cold_first_use)
+        print(
+            f"Import: {import_time:.3f} s{first_use} "
+            f"(cold {format_time(cold_time)}: {details})"
+        )
     else:
-        with open(input_path, "r") as f:
-            content = f.read().rstrip()
-    t0 = time.perf_counter()
-    answer1 = solution.part1(content)
-    t1 = time.perf_counter()
-    print(f"Part 1: {answer1} ({t1-t0:.3f} s)")
-    if submit_answer == 1:
-        submit(answer1, part="a", day=day, year=year)
-    t2 = time.perf_counter()
-    answer2 = solution.part2(content)
-    t3 = time.perf_counter()
-    print(f"Part 2: {answer2} ({t3-t2:.3f} s)")
-    if submit_answer == 2:
-        submit(answer2, part="b", day=day, year=year)
-    return solution.day_title, (answer1, t1 - t0), (answer2, t3 - t2)
+        print(f"Import: {import_time:.3f} s{first_use}")
+    try:
+        content = get_input(year, day, input_path, store, offline)
+    except MissingInputError as e:
+        print(e)
+        return solution.day_title, (NO_INPUT, None), (NO_INPUT, None)
+    if hasattr(solution, "parse_input"):
+        _, parse_time = timed(solution.parse_input, content)
+        print(f"Parse: {parse_time:.3f} s")
+    ans_times = []
+    for part in (1, 2):
+        answer = MISSING
+        if cache is not None:
+            answer = cache.get(year, day, part, content)
+        if answer is MISSING:
+            answer, t = run_part(year, day, part, content, workers=workers)
+            print(f"Part {part}: {answer} ({t:.3f} s)")
+            if cache is not None:
+                cache.put(year, day, part, content, answer)
+        else:
+            t = 0
+            print(f"Part {part}: {answer} (cached)")
+        if submit_answer == part:
+            aocd.submit(answer, part="ab"[part - 1], day=day, year=year)
+        ans_times.append((answer, t))
+    return solution.day_title, *ans_times
+
+
+def profile_day(year, day, mode, content, top=10):
+    """Profile both parts of a day, print the hottest functions"""
+    solution = import_module(f"year{year}.day{day:02d}")
+    load_lazy(solution)
+    print(f"--- Year {year} Day {day}: {solution.day_title} ---")
+    for part, func in enumerate([solution.part1, solution.part2], start=1):
+        out_dir = Path("outputs") / "profiles" / f"{year}-day{day:02d}-part{part}"
+        answer, hot = profile(mode, func, content, out_dir, top)
+        print(f"Part {part}: {answer} (reports in {out_dir})")
+        for name, value in hot:
+            # the sampling profiler gives share of samples instead of time
+            amount = f"{value:7.1%}" if mode == "sample" else f"{value:7.3f} s"
+            print(f"  {amount}  {name}")
+
+
+def run_days_parallel(
+    year_days, jobs, timeout=None, max_rss=None, store=None, offline=False, cache=None
+):
+    """Solve parts of many days in a process pool.
+    Inputs are fetched in this process, results are printed in day order.
+    Parts exceeding timeout (s) or max_rss (MB) are killed and reported."""
+    scheduled = []
+    # days without input, they come first in the results
+    skipped = []
+    with make_pool(jobs, max_rss) as pool:
+        for year, day in year_days:
+            try:
+                solution, import_time = import_day(year, day)
+            except ModuleNotFoundError:
+                continue
+            try:
+                content = get_input(year, day, store=store, offline=offline)
+            except MissingInputError as e:
+                print(e)
+                skipped.append((year, day, solution.day_title, *[(NO_INPUT, None)] * 2))
+                continue
+            # a future for every part or an answer from cache
+            futures = []
+            for part in (1, 2):
+                answer = MISSING
+                if cache is not None:
+                    answer = cache.get(year, day, part, content)
+                if answer is MISSING:
+                    answer = pool.schedule(
+                        run_part, args=(year, day, part, content), timeout=timeout
+                    )
+                futures.append(answer)
+            scheduled.append(
+                (year, day, solution.day_title, import_time, content, futures)
+            )
+        results = skipped
+        for year, day, day_title, import_time, content, futures in scheduled:
+            print(f"--- Year {year} Day {day}: {day_title} ---")
+            print(f"Import: {import_time:.3f} s")
+            ans_times = []
+            for part, future in enumerate(futures, start=1):
+                if not isinstance(future, Future):
+                    print(f"Part {part}: {future} (cached)")
+                    ans_times.append((future, 0))
+                    continue
+                answer, t, status = collect_result(future)
+                print(f"Part {part}: {answer} ({format_time(t, timeout, status)})")
+                if cache is not None and t is not None:
+                    cache.put(year, day, part, content, answer)
+                ans_times.append((answer, t))
+            results.append((year, day, day_title, *ans_times))
+    return results
 
 
 if __name__ == "__main__":
     parser = init_argparse()
     args = parser.parse_args()
+    pooled = (
+        args.jobs is not None or args.timeout is not None or args.max_rss is not None
+    )
+    if pooled and (args.submit or args.input or args.importtime or args.workers != 1):
+        # the pool solves days in workers, which don't submit, read a given
+        # input file, measure imports or start processes of their own
+        parser.error(
+            "--submit, --input, --importtime and --workers can't be combined "
+            "with --jobs, --timeout or --max-rss"
+        )
+    workers = args.workers or None
+    store = InputStore(args.input_dir) if args.input_dir is not None else None
+    if args.cache_clear:
+        AnswerCache(args.cache or ".aoc_cache").clear()
+    cache = None
+    if args.cache is not None and not args.no_cache:
+        cache = AnswerCache(args.cache)
 
-    if args.input is not None:
+    if args.profile is not None:
+        if args.year is None or args.day is None:
+            print("Please set --year {year} and --day {day} to profile")
+        else:
+            try:
+                content = get_input(
+                    args.year, args.day, args.input, store=store, offline=args.offline
+                )
+            except MissingInputError as e:
+                sys.exit(e)
+            profile_day(args.year, args.day, args.profile, content, args.profile_top)
+    elif args.input is not None:
         if args.day is None:
             print("Please set --year {year} and --day {day} if giving an input file")
         else:
-            day_title, *ans_times = run_day(args.year, args.day, args.input)
+            day_title, *ans_times = run_day(
+                args.year,
+                args.day,
+                args.input,
+                importtime=args.importtime,
+                cache=cache,
+                workers=workers,
+            )
     else:
-        if args.year is not None:
-            year = args.year
+        if args.all_years:
+            years = YEARS
+        elif args.year is not None:
+            years = [args.year]
         else:
-            year = dt.now().year
+            years = [dt.now().year]
         if args.day is not None:
             days = [args.day]
         else:
             days = range(1, 26)
         time_total = 0
-        for day in days:
-            day_title, *ans_times = run_day(
-                year, day, input_path=args.input, submit_answer=args.submit
-            )
-            time_total += sum(at[1] for at in ans_times)
+        answers = []
+        if pooled:
+            t0 = time.perf_counter()
+            year_days = [(year, day) for year in years for day in days]
+            for year, day, day_title, *ans_times in run_days_parallel(
+                year_days,
+                args.jobs or 1,
+                timeout=args.timeout,
+                max_rss=args.max_rss,
+                store=store,
+                offline=args.offline,
+                cache=cache,
+            ):
+                time_total += sum(at[1] for at in ans_times if at[1] is not None)
+                answers += [at[0] for at in ans_times]
+            print(f"Wall time: {time.perf_counter() - t0:.3f}s")
+        else:
+            for year in years:
+                for day in days:
+                    day_title, *ans_times = run_day(
+                        year,
+                        day,
+                        input_path=args.input,
+                        submit_answer=args.submit,
+                        importtime=args.importtime,
+                        store=store,
+                        offline=args.offline,
+                        cache=cache,
+                        workers=workers,
+                    )
+                    time_total += sum(at[1] for at in ans_times if at[1] is not None)
+                    answers += [at[0] for at in ans_times]
         print(f"Total time: {time_total:.3f}s")
+        if any(answer is NO_INPUT for answer in answers):
+            # only with --offline, otherwise missing inputs are downloaded
+            sys.exit(1)
@@ -1,11 +1,21 @@
 import os
+import sys
 from pathlib import Path
 import argparse
-import time
 import pandas as pd
 import matplotlib
-from aocd import get_data
 from importlib import import_module
+from solve import ERROR, run_part, make_pool, collect_result, format_time, get_input
+from util.benchmark import benchmark
+from util.input_store import InputStore, MissingInputError
+from util.history import (
+    append_history,
+    environment,
+    find_regressions,
+    git_commit,
+    latest_medians,
+    load_history,
+)
 
 matplotlib.rcParams.update({"font.size": 14})
 
@@ -26,63 +36,252 @@ def init_argparse() -> argparse.ArgumentParser:
         "--year",
         type=int,
     )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        help="kill a part that runs longer than this many seconds",
+    )
+    parser.add_argument(
+        "-m",
+        "--max-rss",
+        type=int,
+        help="kill a part that maps more than this many MB of memory, "
+        "counting shared libraries (address space, larger than RSS)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="untimed runs before measuring (default 1)",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=5,
+        help="measure at least this many runs (default 5)",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=100,
+        help="measure at most this many runs (default 100)",
+    )
+    parser.add_argument(
+        "--target-ci",
+        type=float,
+        default=0.05,
+        help="stop when 95%% confidence interval of mean time is within "
+        "this fraction of the mean (default 0.05)",
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=10.0,
+        help="stop after measuring this many seconds of a part (default 10)",
+    )
+    parser.add_argument(
+        "--no-gc",
+        action="store_true",
+        help="disable garbage collection during timed runs",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="processes for parts with a workers argument, 0 for every CPU "
+        "(default 1), can't be used with --timeout or --max-rss",
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=str,
+        default=os.environ.get("AOC_INPUTS"),
+        help="directory with {year}/day{NN}.txt inputs (default $AOC_INPUTS)",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="never download inputs, fail on days missing from --input-dir",
+    )
+    parser.add_argument(
+        "-c",
+        "--compare",
+        type=str,
+        metavar="REF",
+        help="compare times of current commit to git REF from history, "
+        "exit with code 1 if there are regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="median slower by more than this fraction is a regression (default 0.1)",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=1.0,
+        help="don't check parts faster than this many ms (default 1)",
+    )
     return parser
 
 
-def run_day(year, day):
+def time_part(year, day, part, content, pool=None, timeout=None, **options):
+    """Benchmark a part, options are passed to util.benchmark.benchmark.
+    With a pool every run happens in a worker and is killed if it exceeds limits,
+    then the outcome (TIMEOUT, OOM or ERROR) is the result value and no times
+    are kept."""
+    disable_gc = options.pop("disable_gc", False)
+    workers = options.pop("workers", 1)
+    if pool is None:
+
+        def run():
+            return run_part(year, day, part, content, disable_gc, workers)
+
+    else:
+
+        def run():
+            future = pool.schedule(
+                run_part, args=(year, day, part, content, disable_gc), timeout=timeout
+            )
+            answer, t, status = collect_result(future)
+            if status == ERROR:
+                print(answer)
+            return (answer if status is None else status), t
+
+    return benchmark(run, **options)
+
+
+def format_result(result, timeout=None):
+    if result.runs == 0:
+        return format_time(None, timeout, result.value)
+    return (
+        f"{format_time(result.median)} ± {result.rel_ci:.1%}, "
+        f"{result.runs} runs, IQR {result.iqr * 1000:.1f} ms"
+    )
+
+
+def run_day(year, day, pool=None, timeout=None, store=None, offline=False, **options):
     solution = import_module(f"year{year}.day{day:02d}")
     print(f"--- Year {year} Day {day}: {solution.day_title} ---")
-    content = get_data(year=year, day=day, block=True)
-    times1 = []
-    for _ in range(5):
-        t0 = time.perf_counter()
-        answer1 = solution.part1(content)
-        t1 = time.perf_counter()
-        times1.append(t1 - t0)
-    median_time_1 = sorted(times1)[len(times1) // 2]
-    print(f"Part 1: {answer1} ({sorted(times1)[len(times1) // 2]:.3f} s)")
-    times2 = []
-    for _ in range(5):
-        t2 = time.perf_counter()
-        answer2 = solution.part2(content)
-        t3 = time.perf_counter()
-        times2.append(t3 - t2)
-    median_time_2 = sorted(times2)[len(times2) // 2]
-    print(f"Part 2: {answer2} ({median_time_2:.3f} s)")
-    return solution.day_title, (answer1, median_time_1), (answer2, median_time_2)
+    content = get_input(year, day, store=store, offline=offline)
+    results = []
+    for part in (1, 2):
+        result = time_part(year, day, part, content, pool, timeout, **options)
+        print(f"Part {part}: {result.value} ({format_result(result, timeout)})")
+        results.append(result)
+    return solution.day_title, *results
+
+
+def compare_to_ref(history_path, year, ref, threshold=0.1, min_ms=1.0):
+    """Print parts of a year that got slower than at git ref.
+    Only history from this host and python version is compared.
+    Return False if there are regressions or nothing to compare against."""
+    env = environment()
+    same_env = dict(year=year, python=env["python"], host=env["host"])
+    ref_commit = git_commit(ref)
+    if ref_commit is None:
+        print(f"Unknown git ref {ref}")
+        return False
+    # runs with uncommitted changes are recorded under HEAD too, they are
+    # what gets compared but can't be the baseline
+    baseline = latest_medians(
+        load_history(history_path, commit=ref_commit, **same_env), committed=True
+    )
+    current = latest_medians(
+        load_history(history_path, commit=env["commit"], **same_env)
+    )
+    if not baseline or not current:
+        missing = ref if not baseline else "HEAD"
+        print(f"No {year} history for {missing} on this host, rerun it first")
+        return False
+    regressions = find_regressions(baseline, current, threshold, min_ms)
+    for (y, d, p), base_ms, ms in regressions:
+        print(
+            f"Regression: year {y} day {d} part {p} "
+            f"{base_ms:.1f} ms -> {ms:.1f} ms (+{ms / base_ms - 1:.0%})"
+        )
+    print(
+        f"{len(regressions)} of {len(current)} parts are slower than {ref} "
+        f"by more than {threshold:.0%}"
+    )
+    return not regressions
 
 
 if __name__ == "__main__":
     parser = init_argparse()
     args = parser.parse_args()
+    if args.workers != 1 and (args.timeout is not None or args.max_rss is not None):
+        # parts run in pool workers then, which can't start processes of their own
+        parser.error("--workers can't be combined with --timeout or --max-rss")
 
     path = Path("outputs") / "time_stats"
     os.makedirs(path, exist_ok=True)
+    history_path = path / "history.jsonl"
 
     if args.rerun:
         res = []
+        history = []
         N = 12 if args.year >= 2025 else 25
         days = range(1, N + 1)
+        limited = args.timeout is not None or args.max_rss is not None
+        pool = make_pool(max_rss=args.max_rss) if limited else None
+        store = InputStore(args.input_dir) if args.input_dir is not None else None
+        options = dict(
+            warmup=args.warmup,
+            min_runs=args.min_runs,
+            max_runs=args.max_runs,
+            target_rel_ci=args.target_ci,
+            max_time=args.max_time,
+            disable_gc=args.no_gc,
+            workers=args.workers or None,
+        )
         for day in days:
             try:
-                day_title, *ans_times = run_day(args.year, day)
-                for i, (answer, t) in enumerate(ans_times):
-                    res.append(dict(day=day, title=day_title, part=i + 1, time=t))
-            except ModuleNotFoundError:
-                res.append(dict(day=day, title="?", part=1, time=None))
-                res.append(dict(day=day, title="?", part=2, time=None))
-        res = (
-            pd.DataFrame(res)
-            .set_index(["day", "title", "part"])["time"]
-            .unstack()
-            .multiply(1000)
-            .add_prefix("part_")
-            .add_suffix("_ms")
+                day_title, *results = run_day(
+                    args.year, day, pool, args.timeout, store, args.offline, **options
+                )
+                for i, result in enumerate(results):
+                    # value is TIMEOUT, OOM or ERROR for parts that gave no answer
+                    status = result.value if result.runs == 0 else None
+                    res.append(
+                        dict(
+                            day=day,
+                            title=day_title,
+                            part=i + 1,
+                            status=status,
+                            **result.stats_ms(),
+                        )
+                    )
+                    history.append(dict(year=args.year, **res[-1]))
+            except (ModuleNotFoundError, MissingInputError) as e:
+                if isinstance(e, MissingInputError):
+                    print(e)
+                res.append(dict(day=day, title="?", part=1))
+                res.append(dict(day=day, title="?", part=2))
+        if pool is not None:
+            pool.close()
+            pool.join()
+        append_history(history_path, history)
+        if not history:
+            # no day was found or had an input, there is no column to pick
+            print(f"No {args.year} day was timed")
+            sys.exit(1)
+        res = pd.DataFrame(res).set_index(["day", "title", "part"]).unstack()
+        # columns like part_1_ms (median), part_1_min_ms, part_1_runs, ...
+        res.columns = [f"part_{part}_{stat}" for stat, part in res.columns]
+        res = res.dropna(axis=1, how="all")
+        first = ["part_1_ms", "part_2_ms"]
+        # reindex keeps a part missing from every day as an empty column
+        res = res.reindex(
+            columns=first + sorted(c for c in res.columns if c not in first)
         )
-        res.to_csv(path / f"{args.year}.csv", float_format="%.1f")
+        res.to_csv(path / f"{args.year}.csv", float_format="%.3f")
     else:
         res = pd.read_csv(path / f"{args.year}.csv").set_index(["title", "day"])
 
+    res = res[["part_1_ms", "part_2_ms"]]
     ax = res.multiply(0.001).plot.barh()
     ax.set(
         ylabel=None,
@@ -108,3 +307,9 @@ if __name__ == "__main__":
     ax.figure.savefig(path / f"{args.year}.png")
     total_ms = res.part_1_ms.sum() + res.part_2_ms.sum()
     print(f"Total time: {total_ms:.0f} ms")
+
+    if args.compare is not None:
+        ok = compare_to_ref(
+            history_path, args.year, args.compare, args.threshold, args.min_ms
+        )
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,105 @@
+import ast
+import hashlib
+import json
+import shutil
+from importlib.util import find_spec
+from pathlib import Path
+
+MISSING = object()
+
+
+def local_imports(path: Path) -> list:
+    """Names of util modules imported by a source file"""
+    tree = ast.parse(path.read_text())
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+            names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+    return [n for n in names if n == "util" or n.startswith("util.")]
+
+
+def source_hash(module_name: str) -> str:
+    """sha256 of a module source together with util modules it depends on"""
+    digest = hashlib.sha256()
+    seen = set()
+    stack = [module_name]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        try:
+            spec = find_spec(name)
+        except ModuleNotFoundError:
+            # from util.module import name gives util.module.name here
+            spec = None
+        if spec is None or spec.origin is None:
+            continue
+        seen.add(name)
+        path = Path(spec.origin)
+        digest.update(name.encode())
+        digest.update(path.read_bytes())
+        stack.extend(local_imports(path))
+    return digest.hexdigest()
+
+
+class AnswerCache:
+    """Answers saved on disk keyed by input and source code of the solution.
+    Changing the day module or any util module it imports invalidates them."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.source_hashes = {}
+
+    def path(self, year: int, day: int, part: int, content: str) -> Path:
+        module_name = f"year{year}.day{day:02d}"
+        if module_name not in self.source_hashes:
+            self.source_hashes[module_name] = source_hash(module_name)
+        key = hashlib.sha256(content.encode())
+        key.update(self.source_hashes[module_name].encode())
+        return self.root / str(year) / f"day{day:02d}-{part}-{key.hexdigest()}.json"
+
+    def get(self, year: int, day: int, part: int, content: str):
+        """Cached answer or MISSING"""
+        path = self.path(year, day, part, content)
+        if not path.exists():
+            return MISSING
+        with open(path) as f:
+            return json.load(f)["answer"]
+
+    def put(self, year: int, day: int, part: int, content: str, answer):
+        path = self.path(year, day, part, content)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            # numpy and sympy numbers are saved as strings
+            json.dump(dict(answer=answer), f, default=str)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def test_source_hash_includes_util():
+    assert "util.segments" in local_imports(Path(find_spec("year2025.day05").origin))
+    assert source_hash("year2025.day05") != source_hash("year2025.day06")
+    assert source_hash("year2025.day05") == source_hash("year2025.day05")
+
+
+def test_cache(tmp_path):
+    cache = AnswerCache(tmp_path)
+    assert cache.get(2025, 5, 1, "1-3\n\n2") is MISSING
+    cache.put(2025, 5, 1, "1-3\n\n2", 1)
+    cache.put(2025, 5, 2, "1-3\n\n2", None)
+    assert AnswerCache(tmp_path).get(2025, 5, 1, "1-3\n\n2") == 1
+    assert AnswerCache(tmp_path).get(2025, 5, 2, "1-3\n\n2") is None
+    assert cache.get(2025, 5, 1, "1-4\n\n2") is MISSING
+    cache.clear()
+    assert cache.get(2025, 5, 1, "1-3\n\n2") is MISSING
+
+
+def test_source_change_invalidates(tmp_path):
+    cache = AnswerCache(tmp_path)
+    cache.put(2025, 5, 1, "1-3\n\n2", 1)
+    cache.source_hashes["year2025.day05"] = "edited"
+    assert cache.get(2025, 5, 1, "1-3\n\n2") is MISSING
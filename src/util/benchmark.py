@@ -0,0 +1,188 @@
+import gc
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+
+# two-sided 95% quantiles of Student's t distribution by degrees of freedom
+T_95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31}
+T_95.update({9: 2.26, 10: 2.23, 15: 2.13, 20: 2.09, 30: 2.04, 60: 2.00})
+
+
+def t_95(df: int) -> float:
+    # use the closest tabulated value with fewer degrees of freedom
+    known = [k for k in T_95 if k <= df]
+    return T_95[max(known)] if df <= 60 else 1.96
+
+
+@dataclass
+class BenchmarkResult:
+    """Return value of the benchmarked function and times of measured runs"""
+
+    value: Any
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def runs(self) -> int:
+        return len(self.times)
+
+    @property
+    def min(self) -> Optional[float]:
+        return min(self.times) if self.times else None
+
+    @property
+    def median(self) -> Optional[float]:
+        return statistics.median(self.times) if self.times else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return statistics.mean(self.times) if self.times else None
+
+    @property
+    def stddev(self) -> Optional[float]:
+        if not self.times:
+            return None
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+
+    @property
+    def iqr(self) -> Optional[float]:
+        if not self.times:
+            return None
+        if len(self.times) == 1:
+            return 0.0
+        q1, _, q3 = statistics.quantiles(self.times, n=4)
+        return q3 - q1
+
+    @property
+    def rel_ci(self) -> float:
+        """Half-width of 95% confidence interval of the mean relative to the mean"""
+        if len(self.times) < 2:
+            return float("inf")
+        mean = self.mean
+        if mean == 0:
+            return 0.0
+        half_width = t_95(len(self.times) - 1) * self.stddev / len(self.times) ** 0.5
+        return half_width / mean
+
+    def stats_ms(self) -> dict:
+        """Statistics in milliseconds for writing to a csv"""
+        ms = lambda t: None if t is None else t * 1000  # noqa: E731
+        return dict(
+            ms=ms(self.median),
+            min_ms=ms(self.min),
+            mean_ms=ms(self.mean),
+            std_ms=ms(self.stddev),
+            iqr_ms=ms(self.iqr),
+            runs=self.runs,
+        )
+
+
+def timed(func: Callable, *args, disable_gc: bool = False) -> Tuple[Any, float]:
+    """Call func(*args), return its result and time taken in seconds.
+    With disable_gc garbage is collected beforehand and gc is off during the call."""
+    gc_was_enabled = gc.isenabled()
+    if disable_gc:
+        gc.collect()
+        gc.disable()
+    try:
+        t0 = time.perf_counter()
+        value = func(*args)
+        t1 = time.perf_counter()
+    finally:
+        if disable_gc and gc_was_enabled:
+            gc.enable()
+    return value, t1 - t0
+
+
+def benchmark(
+    run: Callable[[], Tuple[Any, Optional[float]]],
+    warmup: int = 1,
+    min_runs: int = 5,
+    max_runs: int = 100,
+    target_rel_ci: float = 0.05,
+    max_time: float = 10.0,
+) -> BenchmarkResult:
+    """Time repeated calls of run() which returns a value and seconds taken.
+
+    Warmup runs are not recorded. Then runs are repeated at least min_runs times
+    and until the 95% confidence interval of mean time is within target_rel_ci
+    of the mean, or max_runs are done, or max_time seconds are spent measuring.
+    A run may report None for time if it was aborted, benchmarking stops then."""
+    for _ in range(warmup):
+        value, t = run()
+        if t is None:
+            return BenchmarkResult(value)
+    result = BenchmarkResult(None)
+    spent = 0.0
+    while result.runs < max_runs:
+        value, t = run()
+        if t is None:
+            return BenchmarkResult(value)
+        result.value = value
+        result.times.append(t)
+        spent += t
+        if result.runs >= min_runs and (
+            result.rel_ci <= target_rel_ci or spent >= max_time
+        ):
+            break
+    return result
+
+
+def test_stats():
+    result = BenchmarkResult(42, [0.1, 0.2, 0.3, 0.4, 0.5])
+    assert result.runs == 5
+    assert result.min == 0.1
+    assert result.median == 0.3
+    assert abs(result.mean - 0.3) < 1e-9
+    assert abs(result.stddev - 0.158113883) < 1e-6
+    assert abs(result.iqr - 0.3) < 1e-9
+    assert result.stats_ms()["ms"] == 300
+
+
+def test_stats_single_run():
+    result = BenchmarkResult(42, [0.1])
+    assert result.stddev == 0
+    assert result.iqr == 0
+    assert result.rel_ci == float("inf")
+
+
+def test_benchmark_stops_when_precise():
+    calls = []
+
+    def run():
+        calls.append(1)
+        return "answer", 0.01
+
+    result = benchmark(run, warmup=2, min_runs=5, max_runs=100)
+    assert result.value == "answer"
+    assert result.runs == 5
+    assert len(calls) == 7
+
+
+def test_benchmark_stops_at_max_runs():
+    times = iter([1, 3] * 100)
+    result = benchmark(lambda: (0, next(times)), warmup=0, max_runs=20, max_time=1e6)
+    assert result.runs == 20
+
+
+def test_benchmark_stops_at_max_time():
+    times = iter([1, 3] * 100)
+    result = benchmark(lambda: (0, next(times)), warmup=0, min_runs=3, max_time=5)
+    assert result.runs == 3
+
+
+def test_benchmark_aborted_run():
+    result = benchmark(lambda: ("TIMEOUT", None))
+    assert result.value == "TIMEOUT"
+    assert result.runs == 0
+    assert result.median is None
+
+
+def test_timed_disable_gc():
+    def gc_state():
+        return gc.isenabled()
+
+    enabled, t = timed(gc_state, disable_gc=True)
+    assert not enabled
+    assert gc.isenabled()
+    assert t >= 0
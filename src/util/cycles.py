@@ -0,0 +1,184 @@
+from collections import namedtuple
+from typing import Any, Callable, Hashable, Tuple
+
+# the sequence start, step(start), step(step(start)), ... is
+# mu steps before the cycle and then repeats every lam steps
+Cycle = namedtuple("Cycle", ["mu", "lam"])
+
+
+def identity(state):
+    return state
+
+
+def check_limit(steps: int, limit: int):
+    if limit is not None and steps > limit:
+        raise ValueError(f"No cycle found in {limit} steps")
+
+
+def find_cycle(
+    step: Callable[[Any], Any],
+    start,
+    key: Callable[[Any], Hashable] = identity,
+    limit: int = None,
+) -> Tuple[Cycle, Any]:
+    """Remembers key(state) of every state until one repeats.
+    Fewest calls to step, memory grows with mu + lam but only keys are kept,
+    so key should be a compact fingerprint of the state.
+    Returns the cycle and the state at step mu."""
+    seen = {}
+    state, n = start, 0
+    while (fingerprint := key(state)) not in seen:
+        check_limit(n, limit)
+        seen[fingerprint] = n
+        state = step(state)
+        n += 1
+    mu = seen[fingerprint]
+    return Cycle(mu, n - mu), state
+
+
+def floyd(
+    step: Callable[[Any], Any],
+    start,
+    key: Callable[[Any], Hashable] = identity,
+    limit: int = None,
+) -> Tuple[Cycle, Any]:
+    """Floyd's tortoise and hare, keeps two states at a time.
+    Returns the cycle and the state at step mu."""
+    tortoise, hare = step(start), step(step(start))
+    n = 1
+    while key(tortoise) != key(hare):
+        check_limit(n, limit)
+        tortoise, hare = step(tortoise), step(step(hare))
+        n += 1
+    # hare is n steps ahead now, which is a multiple of lam,
+    # walking both at the same speed from start they meet at mu
+    mu, tortoise = 0, start
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(hare)
+        mu += 1
+    lam, hare = 1, step(tortoise)
+    tortoise_key = key(tortoise)
+    while tortoise_key != key(hare):
+        hare = step(hare)
+        lam += 1
+    return Cycle(mu, lam), tortoise
+
+
+def brent(
+    step: Callable[[Any], Any],
+    start,
+    key: Callable[[Any], Hashable] = identity,
+    limit: int = None,
+) -> Tuple[Cycle, Any]:
+    """Brent's algorithm, keeps two states at a time and calls step fewer times
+    than floyd. Returns the cycle and the state at step mu."""
+    # the tortoise jumps to the hare at powers of two until the hare
+    # runs into it, then lam is the distance between them
+    power = lam = 1
+    tortoise, hare = start, step(start)
+    tortoise_key = key(tortoise)
+    while tortoise_key != key(hare):
+        check_limit(power + lam, limit)
+        if power == lam:
+            tortoise, tortoise_key = hare, key(hare)
+            power *= 2
+            lam = 0
+        hare = step(hare)
+        lam += 1
+    # with the hare lam steps ahead they meet at mu
+    tortoise = hare = start
+    for _ in range(lam):
+        hare = step(hare)
+    mu = 0
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(hare)
+        mu += 1
+    return Cycle(mu, lam), tortoise
+
+
+def fast_forward(
+    step: Callable[[Any], Any],
+    start,
+    n: int,
+    key: Callable[[Any], Hashable] = identity,
+    method=find_cycle,
+) -> Tuple[Cycle, Any]:
+    """State after n steps, skipping whole laps of the cycle found by method
+    (find_cycle, floyd or brent). Returns the cycle and the state."""
+    cycle, state = method(step, start, key)
+    if n < cycle.mu:
+        state = start
+        todo = n
+    else:
+        todo = (n - cycle.mu) % cycle.lam
+    for _ in range(todo):
+        state = step(state)
+    return cycle, state
+
+
+METHODS = [find_cycle, floyd, brent]
+
+
+def test_cycle():
+    # 0 1 2 3 4 5 3 4 5 ...
+    successors = [1, 2, 3, 4, 5, 3]
+    for method in METHODS:
+        assert method(successors.__getitem__, 0) == (Cycle(3, 3), 3)
+        assert method(successors.__getitem__, 4) == (Cycle(0, 3), 4)
+        for n, expected in [(2, 2), (3, 3), (5, 5), (6, 3), (10**9, 4)]:
+            cycle, state = fast_forward(successors.__getitem__, 0, n, method=method)
+            assert cycle == (3, 3) and state == expected
+
+
+def test_cycle_key():
+    # states are lists, compared by their first element
+    def step(state):
+        return [(state[0] * 3 + 1) % 10, len(state)]
+
+    for method in METHODS:
+        cycle, state = method(step, [0], key=lambda s: s[0])
+        assert cycle == (0, 4) and state[0] == 0
+
+
+def test_cycle_limit():
+    import pytest
+
+    for method in METHODS:
+        with pytest.raises(ValueError):
+            method(lambda x: x + 1, 0, limit=100)
+
+
+def test_cycle_fuzzy():
+    from random import randrange
+
+    for _ in range(200):
+        n = randrange(1, 50)
+        successors = [randrange(n) for _ in range(n)]
+        start = randrange(n)
+        sequence = [start]
+        while sequence[-1] not in sequence[:-1]:
+            sequence.append(successors[sequence[-1]])
+        mu = sequence.index(sequence[-1])
+        expected = (Cycle(mu, len(sequence) - 1 - mu), sequence[mu])
+        for method in METHODS:
+            assert method(successors.__getitem__, start) == expected
+
+
+def test_cycle_benchmark():
+    import time
+
+    print()
+    # x -> x*x + 1 mod a prime has a tail and a cycle of a few thousand steps
+    p = 10_000_019
+    for method in METHODS:
+        calls = 0
+
+        def step(x):
+            nonlocal calls
+            calls += 1
+            return (x * x + 1) % p
+
+        t0 = time.perf_counter()
+        cycle, _ = method(step, 2)
+        t = time.perf_counter() - t0
+        print(f"{method.__name__}: {cycle}, {calls} steps, {t * 1000:.1f} ms")
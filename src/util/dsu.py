@@ -0,0 +1,216 @@
+import heapq
+from typing import Callable, Iterable, List, Optional
+from util.search import grid_neighbours
+
+
+class DisjointSet:
+    """Union-find over elements 0..n-1 kept in flat lists,
+    with path halving in find and union by size.
+    size[root] is the size of the set, components is the number of sets."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """Join sets of a and b, return False if they were joined already"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.components -= 1
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def component_size(self, x: int) -> int:
+        return self.size[self.find(x)]
+
+    def roots(self) -> List[int]:
+        return [x for x, parent in enumerate(self.parent) if x == parent]
+
+    def largest(self, k: int) -> List[int]:
+        """Sizes of k largest sets, biggest first"""
+        return heapq.nlargest(k, (self.size[root] for root in self.roots()))
+
+
+def first_disconnect(
+    n: int,
+    neighbours: Callable[[int], Iterable[int]],
+    removals: List[int],
+    a: int,
+    b: int,
+) -> Optional[int]:
+    """Nodes of a graph get removed one by one in the order of removals.
+    Return the index in removals of the node whose removal first disconnects
+    a from b. None if they stay connected after every removal, or if they
+    are not connected even before the first one.
+    Works backwards: starts with all of removals gone and adds them back
+    in reverse joining them to their neighbours, so it's one pass of unions
+    instead of a search after every removal."""
+    first_removed = {}
+    for i, node in enumerate(removals):
+        first_removed.setdefault(node, i)
+    removed = bytearray(n)
+    for node in first_removed:
+        removed[node] = 1
+    dsu = DisjointSet(n)
+    for node in range(n):
+        if not removed[node]:
+            for other in neighbours(node):
+                if not removed[other]:
+                    dsu.union(node, other)
+    if dsu.connected(a, b):
+        return None
+    for i in range(len(removals) - 1, -1, -1):
+        node = removals[i]
+        if first_removed[node] != i:
+            # removed again later, nothing changes here
+            continue
+        removed[node] = 0
+        for other in neighbours(node):
+            if not removed[other]:
+                dsu.union(node, other)
+        if dsu.connected(a, b):
+            return i
+    # still apart with every removal undone: a and b were never connected
+    return None
+
+
+def grid_first_disconnect(R: int, C: int, cells, start, finish) -> Optional[int]:
+    """first_disconnect for an R x C grid where cells (r, c) get blocked"""
+    moves = grid_neighbours(R, C, set())
+
+    def neighbours(node):
+        return (other for other, _ in moves(node))
+
+    return first_disconnect(
+        R * C,
+        neighbours,
+        [r * C + c for r, c in cells],
+        start[0] * C + start[1],
+        finish[0] * C + finish[1],
+    )
+
+
+def test_disjoint_set():
+    dsu = DisjointSet(6)
+    assert dsu.union(0, 1)
+    assert dsu.union(2, 3)
+    assert not dsu.union(1, 0)
+    assert dsu.union(1, 3)
+    assert dsu.connected(0, 2)
+    assert not dsu.connected(0, 4)
+    assert dsu.component_size(3) == 4
+    assert dsu.components == 3
+    assert sorted(dsu.roots()) == sorted({dsu.find(x) for x in range(6)})
+    assert dsu.largest(2) == [4, 1]
+
+
+def test_first_disconnect_path():
+    # a path 0 - 1 - 2 - 3 breaks when 2 goes
+    def neighbours(node):
+        return [x for x in (node - 1, node + 1) if 0 <= x < 4]
+
+    assert first_disconnect(4, neighbours, [2, 1], 0, 3) == 0
+    assert first_disconnect(4, neighbours, [3, 2], 0, 1) is None
+    assert first_disconnect(4, neighbours, [2, 2, 1], 0, 3) == 0
+    # 0 - 1 and 2 - 3 are never connected
+    assert first_disconnect(4, lambda node: [node ^ 1], [1, 2], 0, 3) is None
+
+
+def connected_by_flood(R, C, blocked, start, finish):
+    todo, seen = [start], {start}
+    while todo:
+        r, c = todo.pop()
+        for rn, cn in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= rn < R and 0 <= cn < C and (rn, cn) not in blocked | seen:
+                seen.add((rn, cn))
+                todo.append((rn, cn))
+    return finish in seen
+
+
+def test_grid_first_disconnect_fuzzy():
+    from random import randrange, shuffle
+
+    for _ in range(50):
+        R, C = randrange(2, 7), randrange(2, 7)
+        cells = [(r, c) for r in range(R) for c in range(C)][1:-1]
+        shuffle(cells)
+        start, finish = (0, 0), (R - 1, C - 1)
+        index = grid_first_disconnect(R, C, cells, start, finish)
+        assert index is not None
+        assert connected_by_flood(R, C, set(cells[:index]), start, finish)
+        assert not connected_by_flood(R, C, set(cells[: index + 1]), start, finish)
+
+
+def test_first_disconnect_benchmark():
+    from random import shuffle
+    import time
+
+    print()
+    for size in (71, 501):
+        cells = [(r, c) for r in range(size) for c in range(size)][1:-1]
+        shuffle(cells)
+        t0 = time.perf_counter()
+        index = grid_first_disconnect(size, size, cells, (0, 0), (size - 1, size - 1))
+        t = time.perf_counter() - t0
+        print(f"{size}x{size}: byte {index} of {len(cells)} in {t * 1000:.0f} ms")
+
+
+def merge_sets(n, pairs):
+    """Connecting by re-pointing python sets, how 2025 day 8 did it before"""
+    connections = {i: {i} for i in range(n)}
+    for i, j in pairs:
+        conn = connections[i]
+        if j in conn:
+            continue
+        conn.update(connections[j])
+        for b in conn:
+            connections[b] = conn
+    return connections
+
+
+def test_playground_benchmark():
+    import time
+    import numpy as np
+    from scipy.spatial import cKDTree
+
+    print()
+    n = 100_000
+    rng = np.random.default_rng(8)
+    points = rng.integers(0, 100_000, size=(n, 3))
+    # nearest pairs of points by distance, like in 2025 day 8
+    pairs = cKDTree(points).query_pairs(r=2000, output_type="ndarray")
+    d = np.linalg.norm(points[pairs[:, 0]] - points[pairs[:, 1]], axis=1)
+    pairs = pairs[np.argsort(d)].tolist()
+
+    t0 = time.perf_counter()
+    dsu = DisjointSet(n)
+    for i, j in pairs:
+        dsu.union(i, j)
+    largest = dsu.largest(3)
+    t_dsu = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    connections = merge_sets(n, pairs)
+    sizes = sorted({id(c): len(c) for c in connections.values()}.values())
+    t_sets = time.perf_counter() - t0
+
+    assert sizes[::-1][:3] == largest
+    print(
+        f"{n} points, {len(pairs)} pairs, {dsu.components} circuits: "
+        f"sets {t_sets * 1000:.0f} ms, union-find {t_dsu * 1000:.0f} ms"
+    )
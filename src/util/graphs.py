@@ -0,0 +1,103 @@
+from typing import List
+
+
+def strongly_connected_components(successors: List[List[int]]) -> List[List[int]]:
+    """Tarjan's algorithm over nodes 0..n-1 without recursion.
+    Components come out in reverse topological order: every edge between
+    two components leads to one that's earlier in the list."""
+    n = len(successors)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        # nodes being visited with the position in their successors to go on from
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = 1
+            nexts = successors[node]
+            while i < len(nexts):
+                next_node = nexts[i]
+                i += 1
+                if index[next_node] < 0:
+                    work.append((node, i))
+                    work.append((next_node, 0))
+                    break
+                if on_stack[next_node] and index[next_node] < low[node]:
+                    low[node] = index[next_node]
+            else:
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        other = stack.pop()
+                        on_stack[other] = 0
+                        component.append(other)
+                        if other == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+    return components
+
+
+def condensation(successors: List[List[int]], components: List[List[int]]):
+    """Component number of every node and the components
+    every component has edges to"""
+    component_of = [0] * len(successors)
+    for i, component in enumerate(components):
+        for node in component:
+            component_of[node] = i
+    edges = []
+    for i, component in enumerate(components):
+        targets = {component_of[s] for node in component for s in successors[node]}
+        targets.discard(i)
+        edges.append(sorted(targets))
+    return component_of, edges
+
+
+def reachable(successors: List[List[int]], start: int) -> set:
+    seen, todo = {start}, [start]
+    while todo:
+        for node in successors[todo.pop()]:
+            if node not in seen:
+                seen.add(node)
+                todo.append(node)
+    return seen
+
+
+def test_strongly_connected_components():
+    # 0 -> 1 -> 2 -> 0, 2 -> 3 -> 4 -> 3, 5 alone
+    successors = [[1], [2], [0, 3], [4], [3], []]
+    components = strongly_connected_components(successors)
+    assert sorted(sorted(c) for c in components) == [[0, 1, 2], [3, 4], [5]]
+    component_of, edges = condensation(successors, components)
+    assert edges[component_of[0]] == [component_of[3]]
+    assert edges[component_of[3]] == []
+
+
+def test_strongly_connected_components_fuzzy():
+    from random import randrange
+
+    for _ in range(100):
+        n = randrange(1, 30)
+        successors = [[randrange(n) for _ in range(randrange(3))] for _ in range(n)]
+        components = strongly_connected_components(successors)
+        assert sorted(node for c in components for node in c) == list(range(n))
+        component_of, edges = condensation(successors, components)
+        reach = [reachable(successors, node) for node in range(n)]
+        for a in range(n):
+            for b in range(n):
+                same = b in reach[a] and a in reach[b]
+                assert same == (component_of[a] == component_of[b])
+        # edges only go to components found earlier
+        assert all(j < i for i, targets in enumerate(edges) for j in targets)
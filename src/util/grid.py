@@ -0,0 +1,157 @@
+from typing import Iterable, List, Tuple
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+class Grid:
+    """Character grid as a uint8 numpy array with a border of sentinel cells,
+    so that stepping off the edge lands on the border instead of needing
+    a bounds check. Cells are addressed either by (r, c) in the text
+    or by a flat index into the padded array where the neighbours of a cell
+    are at fixed offsets.
+
+    Reading single numpy elements from python is slow, loops that walk
+    the grid cell by cell should use tolist() and flat indices."""
+
+    DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+    DIRECTIONS8 = DIRECTIONS + [(-1, 1), (1, 1), (1, -1), (-1, -1)]
+
+    def __init__(self, text: str, border: str = " ", pad: int = 1):
+        lines = text.split("\n")
+        self.R, self.C = len(lines), len(lines[0])
+        self.pad = pad
+        # width of a padded row, going down one row is +W in flat indices
+        self.W = self.C + 2 * pad
+        cells = np.frombuffer("".join(lines).encode(), dtype=np.uint8)
+        self.array = np.full((self.R + 2 * pad, self.W), ord(border), dtype=np.uint8)
+        self.array[pad : pad + self.R, pad : pad + self.C] = cells.reshape(
+            self.R, self.C
+        )
+        self.flat = self.array.reshape(-1)
+        self.offsets = self.flat_offsets(self.DIRECTIONS)
+
+    @property
+    def cells(self):
+        """The grid without its border, a view that writes through to array"""
+        return self.shifted(0, 0)
+
+    def shifted(self, dr: int, dc: int):
+        """View of the same shape as cells where [r, c] is the cell at
+        (r + dr, c + dc). Shifts of up to pad cells stay inside the border."""
+        r, c = self.pad + dr, self.pad + dc
+        return self.array[r : r + self.R, c : c + self.C]
+
+    def row(self, r: int):
+        return self.cells[r]
+
+    def col(self, c: int):
+        return self.cells[:, c]
+
+    def flat_offsets(self, directions: Iterable[Tuple[int, int]]) -> List[int]:
+        return [dr * self.W + dc for dr, dc in directions]
+
+    def index(self, r: int, c: int) -> int:
+        return (r + self.pad) * self.W + c + self.pad
+
+    def position(self, index: int) -> Tuple[int, int]:
+        r, c = divmod(index, self.W)
+        return r - self.pad, c - self.pad
+
+    def in_bounds(self, r: int, c: int) -> bool:
+        return 0 <= r < self.R and 0 <= c < self.C
+
+    def __getitem__(self, rc: Tuple[int, int]) -> str:
+        r, c = rc
+        return chr(self.array[r + self.pad, c + self.pad])
+
+    def __setitem__(self, rc: Tuple[int, int], char: str):
+        r, c = rc
+        self.array[r + self.pad, c + self.pad] = ord(char)
+
+    def mask(self, chars: str):
+        """Boolean array of cells holding any of chars"""
+        return np.isin(self.cells, np.frombuffer(chars.encode(), dtype=np.uint8))
+
+    def count(self, chars: str) -> int:
+        return int(self.mask(chars).sum())
+
+    def find_all(self, chars: str) -> List[Tuple[int, int]]:
+        """(r, c) of cells holding any of chars in reading order"""
+        return [tuple(rc) for rc in np.argwhere(self.mask(chars)).tolist()]
+
+    def find(self, char: str) -> Tuple[int, int]:
+        index = int(np.argmax(self.cells.reshape(-1) == ord(char)))
+        r, c = divmod(index, self.C)
+        if self.cells[r, c] != ord(char):
+            raise ValueError(f"{char!r} not found in grid")
+        return r, c
+
+    def flat_indices(self, chars: str) -> List[int]:
+        """Flat indices of cells holding any of chars"""
+        mask = np.isin(self.flat, np.frombuffer(chars.encode(), dtype=np.uint8))
+        return np.flatnonzero(mask).tolist()
+
+    def tolist(self) -> List[int]:
+        """Character codes of the padded grid as a flat python list"""
+        return self.flat.tolist()
+
+    def load(self, codes: List[int]):
+        """Write back codes taken with tolist() and changed since"""
+        self.flat[:] = codes
+
+    @property
+    def lines(self) -> List[str]:
+        return [row.tobytes().decode() for row in self.cells]
+
+    def __str__(self) -> str:
+        return "\n".join(self.lines)
+
+
+test_input = """
+#.#
+..S
+""".strip()
+
+
+def test_grid_layout():
+    grid = Grid(test_input, border="+")
+    assert grid.R == 2 and grid.C == 3
+    assert grid.array.shape == (4, 5)
+    assert str(grid) == test_input
+    assert grid[1, 2] == "S" and grid.find("S") == (1, 2)
+    i = grid.index(1, 2)
+    assert grid.position(i) == (1, 2)
+    up, right, down, left = grid.offsets
+    assert chr(grid.flat[i + up]) == "#"
+    assert chr(grid.flat[i + right]) == "+"  # border
+    assert chr(grid.flat[i + down]) == "+"
+    codes = grid.tolist()
+    assert codes[i + left] == ord(".")
+    codes[i + left] = ord("O")
+    grid.load(codes)
+    assert str(grid) == "#.#\n.OS"
+
+
+def test_grid_helpers():
+    grid = Grid(test_input)
+    assert grid.count("#") == 2
+    assert grid.count(".S") == 4
+    assert grid.find_all("#") == [(0, 0), (0, 2)]
+    assert [grid.position(i) for i in grid.flat_indices("S")] == [(1, 2)]
+    assert grid.mask(".").tolist() == [[False, True, False], [True, True, False]]
+    assert grid.row(1).tobytes() == b"..S"
+    assert grid.col(0).tobytes() == b"#."
+    assert grid.shifted(1, 1)[0, 0] == ord(".")
+    assert grid.shifted(1, 1)[1, 2] == ord(" ")
+
+
+def test_grid_views_write_through():
+    import pytest
+
+    grid = Grid(test_input)
+    grid[0, 1] = "O"
+    grid.row(1)[0] = ord("#")
+    assert str(grid) == "#O#\n#.S"
+    with pytest.raises(ValueError):
+        grid.find("E")
@@ -0,0 +1,137 @@
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Key = Tuple[int, int, int]  # year, day, part
+
+
+def git_commit(ref: str = "HEAD") -> Optional[str]:
+    """Full hash of a git ref or None if it can't be resolved"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--verify", f"{ref}^{{commit}}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def git_dirty() -> Optional[bool]:
+    """Whether tracked files have uncommitted changes, None outside git"""
+    try:
+        out = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return bool(out.stdout.strip())
+
+
+def environment() -> dict:
+    """What a benchmark result depends on apart from the code.
+    dirty tells that the code was HEAD with uncommitted changes."""
+    return dict(
+        commit=git_commit(),
+        dirty=git_dirty(),
+        python=platform.python_version(),
+        host=platform.node(),
+    )
+
+
+def append_history(path: Path, records: Iterable[dict]):
+    """Append records to a json-lines file, adding environment and timestamp"""
+    env = environment()
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(dict(timestamp=timestamp, **env, **record)) + "\n")
+
+
+def load_history(path: Path, **filters) -> List[dict]:
+    """Records from a json-lines file that match all filters, e.g. commit=..."""
+    if not Path(path).exists():
+        return []
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if all(record.get(k) == v for k, v in filters.items()):
+                records.append(record)
+    return records
+
+
+def latest_medians(records: Iterable[dict], committed=False) -> Dict[Key, float]:
+    """Median time in ms per (year, day, part), later records win.
+    With committed only records of a tree without uncommitted changes count,
+    older records that don't say are taken as committed."""
+    medians = {}
+    for r in records:
+        if committed and r.get("dirty"):
+            continue
+        if r.get("ms") is not None:
+            medians[(r["year"], r["day"], r["part"])] = r["ms"]
+    return medians
+
+
+def find_regressions(
+    baseline: Dict[Key, float],
+    current: Dict[Key, float],
+    threshold: float = 0.1,
+    min_ms: float = 1.0,
+) -> List[Tuple[Key, float, float]]:
+    """Parts whose median got slower than baseline by more than threshold fraction.
+    Parts faster than min_ms in both runs are too noisy to judge and are skipped."""
+    regressions = []
+    for key, ms in sorted(current.items()):
+        base_ms = baseline.get(key)
+        if base_ms is None or max(ms, base_ms) < min_ms:
+            continue
+        if ms > base_ms * (1 + threshold):
+            regressions.append((key, base_ms, ms))
+    return regressions
+
+
+def test_history_roundtrip(tmp_path):
+    path = tmp_path / "history.jsonl"
+    append_history(path, [dict(year=2024, day=1, part=1, ms=5.0)])
+    append_history(path, [dict(year=2024, day=1, part=1, ms=7.0)])
+    records = load_history(path, host=platform.node())
+    assert len(records) == 2
+    assert latest_medians(records) == {(2024, 1, 1): 7.0}
+    assert records[0]["dirty"] in (True, False, None)
+    assert load_history(path, host="no such host") == []
+    assert load_history(tmp_path / "missing.jsonl") == []
+
+
+def test_latest_medians_committed():
+    records = [
+        dict(year=2024, day=1, part=1, ms=5.0),
+        dict(year=2024, day=1, part=1, ms=6.0, dirty=False),
+        dict(year=2024, day=1, part=1, ms=7.0, dirty=True),
+    ]
+    assert latest_medians(records) == {(2024, 1, 1): 7.0}
+    assert latest_medians(records, committed=True) == {(2024, 1, 1): 6.0}
+    assert latest_medians(records[:1], committed=True) == {(2024, 1, 1): 5.0}
+
+
+def test_find_regressions():
+    baseline = {(2024, 1, 1): 10.0, (2024, 1, 2): 100.0, (2024, 2, 1): 0.1}
+    current = {(2024, 1, 1): 10.5, (2024, 1, 2): 150.0, (2024, 2, 1): 0.5}
+    assert find_regressions(baseline, current) == [((2024, 1, 2), 100.0, 150.0)]
+    assert find_regressions(baseline, current, threshold=0.01) == [
+        ((2024, 1, 1), 10.0, 10.5),
+        ((2024, 1, 2), 100.0, 150.0),
+    ]
+    assert len(find_regressions(baseline, current, min_ms=0)) == 2
+    assert len(find_regressions(baseline, current, threshold=0.01, min_ms=0)) == 3
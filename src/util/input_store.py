@@ -0,0 +1,92 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+
+class MissingInputError(FileNotFoundError):
+    pass
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class InputStore:
+    """Puzzle inputs kept in a directory as {year}/day{day:02d}.txt files.
+    index.json remembers sha256 of every input so that a file changed on disk
+    is noticed instead of silently giving different answers."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def path(self, year: int, day: int) -> Path:
+        return self.root / str(year) / f"day{day:02d}.txt"
+
+    def get(self, year: int, day: int) -> Optional[str]:
+        path = self.path(year, day)
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            content = f.read().rstrip()
+        digest = content_hash(content)
+        key = f"{year}/{day}"
+        if key not in self.index:
+            # a file put into the directory by hand, remember it from now on
+            self.index[key] = digest
+            self.save_index()
+        elif self.index[key] != digest:
+            raise ValueError(
+                f"Input {path} does not match its hash in {self.index_path}, "
+                "delete the file or its index entry to accept the new content"
+            )
+        return content
+
+    def put(self, year: int, day: int, content: str) -> str:
+        content = content.rstrip()
+        path = self.path(year, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        digest = content_hash(content)
+        self.index[f"{year}/{day}"] = digest
+        self.save_index()
+        return digest
+
+    def save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+
+
+def test_put_and_get(tmp_path):
+    store = InputStore(tmp_path)
+    assert store.get(2024, 1) is None
+    digest = store.put(2024, 1, "3 4\n4 3\n")
+    assert store.path(2024, 1) == tmp_path / "2024" / "day01.txt"
+    assert store.get(2024, 1) == "3 4\n4 3"
+    assert InputStore(tmp_path).index == {"2024/1": digest}
+
+
+def test_file_added_by_hand(tmp_path):
+    (tmp_path / "2023").mkdir()
+    (tmp_path / "2023" / "day05.txt").write_text("seeds: 1 2\n")
+    store = InputStore(tmp_path)
+    assert store.get(2023, 5) == "seeds: 1 2"
+    assert "2023/5" in InputStore(tmp_path).index
+
+
+def test_changed_file(tmp_path):
+    import pytest
+
+    store = InputStore(tmp_path)
+    store.put(2024, 1, "3 4")
+    store.path(2024, 1).write_text("3 5")
+    with pytest.raises(ValueError):
+        store.get(2024, 1)
@@ -0,0 +1,112 @@
+import importlib
+import subprocess
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import List
+
+SRC = Path(__file__).parent.parent
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module until one of its attributes is needed"""
+
+    def _lazy_load(self) -> ModuleType:
+        module = importlib.import_module(self.__name__)
+        # copy attributes over so that next lookups don't come here
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._lazy_load(), attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Use instead of `import name` for heavy libraries like numpy or networkx.
+    The module is imported when code first uses its attributes, so days that
+    don't run that code path don't pay for the import."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def in_source_tree(module: ModuleType) -> bool:
+    path = getattr(module, "__file__", None)
+    return path is not None and Path(path).is_relative_to(SRC)
+
+
+def load_lazy(module: ModuleType) -> List[str]:
+    """Import the lazy modules of module and of the modules from this source
+    tree that it uses, so that timing its code doesn't count their import.
+    Returns the names of modules that were not imported before."""
+    imported = []
+    seen = set()
+    todo = [module]
+    while todo:
+        module = todo.pop()
+        if module.__name__ in seen:
+            continue
+        seen.add(module.__name__)
+        for value in list(vars(module).values()):
+            if isinstance(value, LazyModule):
+                if value.__name__ not in sys.modules:
+                    imported.append(value.__name__)
+                value._lazy_load()
+                continue
+            # modules, and modules that functions and classes come from
+            if isinstance(value, ModuleType):
+                name = value.__name__
+            else:
+                name = getattr(value, "__module__", None)
+            used = sys.modules.get(name) if isinstance(name, str) else None
+            if used is not None and in_source_tree(used):
+                todo.append(used)
+    return imported
+
+
+def test_lazy_import():
+    sys.modules.pop("colorsys", None)
+    colorsys = lazy_import("colorsys")
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert "colorsys" in sys.modules
+    assert colorsys.rgb_to_hsv is sys.modules["colorsys"].rgb_to_hsv
+
+
+def test_lazy_import_submodule():
+    dom = lazy_import("xml.dom.minidom")
+    assert dom.parseString("<a/>").documentElement.tagName == "a"
+
+
+def test_load_lazy():
+    import util.graphs
+
+    sys.modules.pop("colorsys", None)
+    module = ModuleType("day")
+    module.colorsys = lazy_import("colorsys")
+    # lazy modules of util modules it uses are loaded too
+    module.reachable = util.graphs.reachable
+    util.graphs.xml_dom = lazy_import("xml.dom.minidom")
+    try:
+        imported = load_lazy(module)
+        assert "colorsys" in imported and "colorsys" in sys.modules
+        assert "parseString" in vars(util.graphs.xml_dom)
+        assert load_lazy(module) == []
+    finally:
+        del util.graphs.xml_dom
+
+
+def test_solver_startup_skips_heavy_libraries():
+    # importing the runner and every day module should not load these
+    heavy = ["numpy", "scipy", "networkx", "sympy", "aocd", "pytest"]
+    src = Path(__file__).parent.parent
+    days = [f"{p.parent.name}.{p.stem}" for p in src.glob("year*/day??.py")]
+    code = (
+        f"import sys, solve, {', '.join(days)}\n"
+        f"print(' '.join(m for m in {heavy} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=src, capture_output=True, text=True
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == ""
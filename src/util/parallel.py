@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Sequence
+
+# what map_reduce was given to share, set in every worker process once
+shared_state = None
+
+
+def set_shared_state(state):
+    global shared_state
+    shared_state = state
+
+
+def run_chunk(func: Callable, reduce: Callable, chunk: Sequence):
+    return reduce(func(shared_state, item) for item in chunk)
+
+
+def default_workers() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else 1
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def map_reduce(
+    func: Callable[[Any, Any], Any],
+    shared,
+    items: Iterable,
+    reduce: Callable[[Iterable], Any] = sum,
+    workers: int = None,
+    chunk_size: int = None,
+):
+    """reduce(func(shared, item) for item in items) with items scattered
+    in chunks over worker processes. Every chunk is reduced where it ran
+    and the chunk results are reduced again, so reduce has to work that way
+    (sum, max, min, any, all). workers=None uses every available CPU.
+    Workers start the platform's default way and shared gets to each once:
+    forked workers inherit it, with spawn it's pickled once per worker.
+    func should not change shared, workers get copies of it.
+    Runs in this process for one worker, one chunk or inside a daemon process
+    (like solve.py workers) that is not allowed to start its own."""
+    items = list(items)
+    if workers is None:
+        workers = default_workers()
+    if chunk_size is None:
+        # a few chunks for every worker so that a slow chunk doesn't hold up the rest
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = chunked(items, chunk_size)
+    if workers <= 1 or len(chunks) <= 1 or multiprocessing.current_process().daemon:
+        return reduce(func(shared, item) for item in items)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        initializer=set_shared_state,
+        initargs=(shared,),
+    ) as pool:
+        results = pool.map(
+            run_chunk, [func] * len(chunks), [reduce] * len(chunks), chunks
+        )
+        return reduce(results)
+
+
+def count_divisors(limit, n):
+    return sum(limit % d == 0 for d in range(1, n + 1))
+
+
+def test_map_reduce():
+    expected = sum(count_divisors(720, n) for n in range(100))
+    for workers in (1, 2, 3):
+        for chunk_size in (None, 1, 7, 1000):
+            assert (
+                map_reduce(count_divisors, 720, range(100), sum, workers, chunk_size)
+                == expected
+            )
+    # divisors of 720 below 100
+    assert map_reduce(count_divisors, 720, range(100), max, workers=2) == 24
+    assert map_reduce(count_divisors, 720, [], sum, workers=2) == 0
+
+
+def slow_count(limit, n):
+    return sum(limit % d == 0 for d in range(1, 20_000 + n))
+
+
+def test_map_reduce_benchmark():
+    import time
+
+    print()
+    print(f"{default_workers()} cpus available")
+    base = None
+    for workers in (1, 2, 4, 8):
+        t0 = time.perf_counter()
+        map_reduce(slow_count, 720720, range(400), sum, workers)
+        t = time.perf_counter() - t0
+        base = base or t
+        print(f"{workers} workers: {t:.2f} s, speedup {base / t:.2f}")
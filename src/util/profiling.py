@@ -0,0 +1,180 @@
+import cProfile
+import inspect
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, List, Tuple
+
+MODES = ["cprofile", "line", "sample"]
+
+
+def module_functions(module: ModuleType) -> List[Callable]:
+    """Functions and methods defined in a module, unwrapped from decorators"""
+    found = []
+    for obj in vars(module).values():
+        if inspect.isclass(obj) and obj.__module__ == module.__name__:
+            candidates = vars(obj).values()
+        else:
+            candidates = [obj]
+        for candidate in candidates:
+            if isinstance(candidate, (staticmethod, classmethod)):
+                candidate = candidate.__func__
+            candidate = inspect.unwrap(candidate) if callable(candidate) else None
+            if (
+                inspect.isfunction(candidate)
+                and candidate.__module__ == module.__name__
+            ):
+                found.append(candidate)
+    return found
+
+
+def profile_cprofile(func, arg, out_dir: Path, top: int = 10):
+    """Run func(arg) under cProfile, save stats, return result and hot functions"""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, arg)
+    profiler.dump_stats(out_dir / "cprofile.pstats")
+    with open(out_dir / "cprofile.txt", "w") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats()
+    stats = pstats.Stats(profiler).stats
+    # stats values are (calls, primitive calls, own time, cumulative time, callers)
+    hot = sorted(
+        (
+            (f"{name} ({Path(file).name}:{line})", v[2])
+            for (file, line, name), v in stats.items()
+        ),
+        key=lambda ft: -ft[1],
+    )
+    return result, hot[:top]
+
+
+def profile_lines(func, arg, out_dir: Path, top: int = 10, module=None):
+    """Run func(arg) under line_profiler timing every function of the module"""
+    from line_profiler import LineProfiler
+
+    profiler = LineProfiler()
+    for f in module_functions(module or sys.modules[func.__module__]):
+        profiler.add_function(f)
+    result = profiler.runcall(func, arg)
+    with open(out_dir / "line.txt", "w") as f:
+        profiler.print_stats(stream=f, stripzeros=True)
+    stats = profiler.get_stats()
+    hot = sorted(
+        (
+            (
+                f"{name} ({Path(file).name}:{line})",
+                sum(t for _, _, t in lines) * stats.unit,
+            )
+            for (file, line, name), lines in stats.timings.items()
+            if lines
+        ),
+        key=lambda ft: -ft[1],
+    )
+    return result, hot[:top]
+
+
+class SamplingProfiler:
+    """Records the call stack of the profiled thread every interval seconds.
+    Sampling can't happen more often than sys.getswitchinterval() because
+    the sampling thread has to get hold of the GIL."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks = Counter()
+
+    def sample(self, thread_id: int, stop: threading.Event):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.runcall.__code__:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def runcall(self, func: Callable, *args) -> Any:
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self.sample, args=(threading.get_ident(), stop), daemon=True
+        )
+        thread.start()
+        try:
+            return func(*args)
+        finally:
+            stop.set()
+            thread.join()
+
+    def hot_functions(self) -> List[Tuple[str, float]]:
+        """Functions with share of samples where they were on top of the stack"""
+        total = sum(self.stacks.values())
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+        return [(name, count / total) for name, count in own.most_common()]
+
+    def folded(self) -> str:
+        """Stacks in the collapsed format used by flamegraph tools"""
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.items()
+        )
+
+
+def profile_samples(func, arg, out_dir: Path, top: int = 10, interval=0.001):
+    """Run func(arg) under the sampling profiler, save stacks for a flamegraph"""
+    profiler = SamplingProfiler(interval)
+    result = profiler.runcall(func, arg)
+    with open(out_dir / "sample.folded", "w") as f:
+        f.write(profiler.folded())
+    hot = profiler.hot_functions()
+    with open(out_dir / "sample.txt", "w") as f:
+        for name, share in hot:
+            f.write(f"{share:7.1%}  {name}\n")
+    return result, hot[:top]
+
+
+def profile(mode: str, func, arg, out_dir, top: int = 10):
+    """Profile func(arg) in one of MODES, write reports to out_dir.
+    Return result of the call and top hot functions with their time (or share)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if mode == "cprofile":
+        return profile_cprofile(func, arg, out_dir, top)
+    elif mode == "line":
+        return profile_lines(func, arg, out_dir, top)
+    elif mode == "sample":
+        return profile_samples(func, arg, out_dir, top)
+    raise ValueError(f"Unknown profiling mode {mode}, expected one of {MODES}")
+
+
+def busy(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def slow_function(n):
+    return sum(busy(n) for _ in range(20))
+
+
+def test_module_functions():
+    from year2024 import day16
+
+    names = [f.__name__ for f in module_functions(day16)]
+    assert "part1" in names
+    assert "search" in names  # a method of ReindeerMaze
+
+
+def test_profile_modes(tmp_path):
+    for mode in MODES:
+        result, hot = profile(mode, slow_function, 20000, tmp_path / mode)
+        assert result == slow_function(20000)
+        assert any("busy" in name for name, _ in hot), mode
+    assert (tmp_path / "cprofile" / "cprofile.pstats").exists()
+    assert (tmp_path / "line" / "line.txt").exists()
+    assert (tmp_path / "sample" / "sample.folded").exists()
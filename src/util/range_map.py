@@ -0,0 +1,178 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+from util.lazy import lazy_import
+from util.segments import Segment1D
+
+np = lazy_import("numpy")
+
+
+class RangeMap:
+    """Piecewise shift of integers: x maps to x + deltas[i]
+    where starts[i] <= x < starts[i + 1]. Below starts[0] numbers map to themselves.
+    Breakpoints are kept sorted so lookups are a binary search."""
+
+    def __init__(self, starts: List[int] = (), deltas: List[int] = ()):
+        self.starts = []
+        self.deltas = []
+        for start, delta in zip(starts, deltas):
+            if self.starts and self.starts[-1] == start:
+                # of two breakpoints at the same place the later one wins
+                self.starts.pop()
+                self.deltas.pop()
+            # drop breakpoints that don't change the delta
+            if delta != (self.deltas[-1] if self.deltas else 0):
+                self.starts.append(start)
+                self.deltas.append(delta)
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Tuple[int, int, int]]) -> "RangeMap":
+        """Map from (destination start, source start, length) ranges,
+        numbers outside of ranges map to themselves"""
+        starts, deltas = [], []
+        end = None
+        for destination, source, length in sorted(ranges, key=lambda r: r[1]):
+            if end is not None and end < source:
+                # a gap between ranges
+                starts.append(end)
+                deltas.append(0)
+            starts.append(source)
+            deltas.append(destination - source)
+            end = source + length
+        if end is not None:
+            starts.append(end)
+            deltas.append(0)
+        return cls(starts, deltas)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __call__(self, x: int) -> int:
+        i = bisect_right(self.starts, x)
+        return x + self.deltas[i - 1] if i else x
+
+    def map_points(self, xs):
+        """Vectorised __call__ for an array of numbers"""
+        xs = np.asarray(xs, dtype=np.int64)
+        deltas = np.array([0] + self.deltas, dtype=np.int64)
+        return xs + deltas[np.searchsorted(self.starts, xs, side="right")]
+
+    def map_segment(self, segment: Segment1D) -> List[Segment1D]:
+        """Images of the parts of a segment that lie on different pieces"""
+        a, b = segment
+        starts = self.starts
+        i = bisect_right(starts, a)
+        delta = self.deltas[i - 1] if i else 0
+        result = []
+        while i < len(starts) and starts[i] <= b:
+            result.append(Segment1D(a + delta, starts[i] - 1 + delta))
+            a, delta = starts[i], self.deltas[i]
+            i += 1
+        result.append(Segment1D(a + delta, b + delta))
+        return result
+
+    def map_segments(self, segments: Iterable[Segment1D]) -> List[Segment1D]:
+        return [image for s in segments for image in self.map_segment(s)]
+
+    def then(self, other: "RangeMap") -> "RangeMap":
+        """Single map that does the same as applying self and then other"""
+        starts, deltas = [], []
+        bounds = [None] + self.starts + [None]
+        for start, end, delta in zip(bounds, bounds[1:], [0] + self.deltas):
+            # other's breakpoints that fall inside the image of this piece
+            # split it into more pieces
+            lo = 0 if start is None else bisect_right(other.starts, start + delta)
+            hi = (
+                len(other.starts)
+                if end is None
+                else bisect_left(other.starts, end + delta)
+            )
+            if start is not None:
+                starts.append(start)
+                deltas.append(delta + (other.deltas[lo - 1] if lo else 0))
+            for j in range(lo, hi):
+                starts.append(other.starts[j] - delta)
+                deltas.append(delta + other.deltas[j])
+        return RangeMap(starts, deltas)
+
+    def __repr__(self) -> str:
+        return f"RangeMap({self.starts}, {self.deltas})"
+
+
+def test_from_ranges():
+    m = RangeMap.from_ranges([(50, 98, 2), (52, 50, 48)])
+    assert m.starts == [50, 98, 100]
+    assert m.deltas == [2, -48, 0]
+    assert [m(x) for x in (49, 50, 97, 98, 99, 100)] == [49, 52, 99, 50, 51, 100]
+    points = m.map_points([49, 50, 97, 98, 99, 100])
+    assert points.tolist() == [49, 52, 99, 50, 51, 100]
+
+
+def test_map_segment():
+    m = RangeMap.from_ranges([(50, 98, 2), (52, 50, 48)])
+    assert m.map_segment(Segment1D(40, 60)) == [(40, 49), (52, 62)]
+    assert m.map_segment(Segment1D(97, 120)) == [(99, 99), (50, 51), (100, 120)]
+    assert m.map_segment(Segment1D(200, 300)) == [(200, 300)]
+
+
+def test_adjacent_ranges_with_same_shift_merge():
+    m = RangeMap.from_ranges([(10, 0, 5), (15, 5, 5)])
+    assert m.starts == [0, 10]
+
+
+def random_map(size=50, n=5):
+    from random import randint
+
+    ranges, source = [], randint(-5, 5)
+    for _ in range(n):
+        length = randint(1, size // n)
+        ranges.append((randint(0, size), source, length))
+        source += length + randint(0, 3)
+    return RangeMap.from_ranges(ranges)
+
+
+def test_then_fuzzy():
+    from random import randint
+
+    for _ in range(200):
+        first, second = random_map(), random_map()
+        both = first.then(second)
+        for x in range(-20, 120):
+            assert both(x) == second(first(x))
+        a = randint(-20, 100)
+        segment = Segment1D(a, a + randint(0, 30))
+        images = both.map_segments([segment])
+        assert sorted(x for s in images for x in range(s.a, s.b + 1)) == sorted(
+            second(first(x)) for x in range(segment.a, segment.b + 1)
+        )
+
+
+def test_composed_benchmark():
+    from random import randint
+    import time
+
+    print()
+    maps = [random_map(10**9, 40) for _ in range(7)]
+    seeds = []
+    for _ in range(10_000):
+        a = randint(0, 10**9)
+        seeds.append(Segment1D(a, a + randint(0, 10**6)))
+
+    t0 = time.perf_counter()
+    todo = seeds
+    for m in maps:
+        todo = m.map_segments(todo)
+    stages = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    composed = maps[0]
+    for m in maps[1:]:
+        composed = composed.then(m)
+    at_once = composed.map_segments(seeds)
+    composed_time = time.perf_counter() - t0
+
+    assert min(at_once).a == min(todo).a
+    print(
+        f"7 stages: {stages * 1000:.1f} ms ({len(todo)} segments), "
+        f"composed: {composed_time * 1000:.1f} ms "
+        f"({len(composed)} breakpoints, {len(at_once)} segments)"
+    )
@@ -0,0 +1,255 @@
+import heapq
+from dataclasses import dataclass, field
+from math import inf
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+class BucketQueue:
+    """Dial's priority queue: a list of buckets indexed by priority.
+    Works when popped priorities never decrease and pushed ones are not far
+    ahead, like in Dijkstra or A* with small integer edge costs."""
+
+    def __init__(self):
+        self.buckets = []
+        self.current = 0
+        self.size = 0
+
+    def push(self, priority: int, item: int):
+        if priority >= len(self.buckets):
+            self.buckets.extend([] for _ in range(priority - len(self.buckets) + 1))
+        self.buckets[priority].append(item)
+        self.size += 1
+
+    def pop(self) -> Tuple[int, int]:
+        while not self.buckets[self.current]:
+            self.current += 1
+        self.size -= 1
+        return self.current, self.buckets[self.current].pop()
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class HeapQueue:
+    """Same interface as BucketQueue on top of heapq, for any priorities"""
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, priority, item: int):
+        heapq.heappush(self.heap, (priority, item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+@dataclass
+class SearchResult:
+    """cost[s] is the lowest cost found to reach state s (inf if not reached),
+    previous[s] the state before it on one best path (-1 for start states).
+    With all_paths=True predecessors[s] has every state before it
+    on some best path."""
+
+    cost: List[float]
+    previous: List[int]
+    best_cost: float = inf
+    goals: List[int] = field(default_factory=list)
+    predecessors: Optional[List[List[int]]] = None
+
+    @property
+    def goal(self) -> Optional[int]:
+        return self.goals[0] if self.goals else None
+
+    def path(self, state: int) -> List[int]:
+        """States of a best path from a start state to state"""
+        path = [state]
+        while self.previous[path[-1]] >= 0:
+            path.append(self.previous[path[-1]])
+        return path[::-1]
+
+    def optimal_states(self, states: Iterable[int] = None) -> set:
+        """States lying on any best path to states (goals by default)"""
+        todo = list(self.goals if states is None else states)
+        seen = set(todo)
+        while todo:
+            for state in self.predecessors[todo.pop()]:
+                if state not in seen:
+                    seen.add(state)
+                    todo.append(state)
+        return seen
+
+    def all_paths(self, state: int) -> Iterator[List[int]]:
+        """Every best path to state, there may be a lot of them"""
+        if not self.predecessors[state]:
+            yield [state]
+        for previous in self.predecessors[state]:
+            for path in self.all_paths(previous):
+                yield path + [state]
+
+
+def iter_search(
+    starts: Iterable[int],
+    neighbours: Callable[[int], Iterable[Tuple[int, int]]],
+    nstates: int,
+    is_goal: Callable[[int], bool] = None,
+    heuristic: Callable[[int], int] = None,
+    bucket: bool = False,
+    all_paths: bool = False,
+    yield_search_states: bool = False,
+):
+    """Dijkstra, or A* given a consistent heuristic, over states numbered
+    from 0 to nstates - 1. neighbours(state) gives (next state, step cost) pairs
+    with non-negative costs. Stops when the first goal is taken from the queue
+    (or when the queue gets past its cost if all_paths is set).
+    With yield_search_states every state taken from the queue is yielded
+    as (state, priority, result, queue length) for visualizations, result is
+    the SearchResult being filled in. The last item yielded is the SearchResult."""
+    predecessors = [[] for _ in range(nstates)] if all_paths else None
+    result = SearchResult([inf] * nstates, [-1] * nstates, predecessors=predecessors)
+    cost, previous = result.cost, result.previous
+    done = bytearray(nstates)
+    queue = BucketQueue() if bucket else HeapQueue()
+    for state in starts:
+        cost[state] = 0
+        queue.push(heuristic(state) if heuristic else 0, state)
+    while len(queue) > 0:
+        priority, state = queue.pop()
+        if priority > result.best_cost:
+            break
+        if done[state]:
+            continue
+        done[state] = 1
+        if yield_search_states:
+            yield state, priority, result, len(queue)
+        state_cost = cost[state]
+        if is_goal is not None and is_goal(state):
+            result.best_cost = state_cost
+            result.goals.append(state)
+            if not all_paths:
+                break
+            continue
+        for next_state, step_cost in neighbours(state):
+            next_cost = state_cost + step_cost
+            if next_cost < cost[next_state]:
+                cost[next_state] = next_cost
+                previous[next_state] = state
+                if all_paths:
+                    predecessors[next_state] = [state]
+                if heuristic:
+                    queue.push(next_cost + heuristic(next_state), next_state)
+                else:
+                    queue.push(next_cost, next_state)
+            elif all_paths and next_cost == cost[next_state]:
+                predecessors[next_state].append(state)
+    yield result
+
+
+def search(*args, **kwargs) -> SearchResult:
+    """Run iter_search to the end and return the SearchResult"""
+    for result in iter_search(*args, **kwargs):
+        pass
+    return result
+
+
+def grid_neighbours(R: int, C: int, walls: set):
+    """Neighbours of cell r * C + c in an R x C grid, moves cost 1"""
+
+    def neighbours(state):
+        r, c = divmod(state, C)
+        if r > 0 and state - C not in walls:
+            yield state - C, 1
+        if r < R - 1 and state + C not in walls:
+            yield state + C, 1
+        if c > 0 and state - 1 not in walls:
+            yield state - 1, 1
+        if c < C - 1 and state + 1 not in walls:
+            yield state + 1, 1
+
+    return neighbours
+
+
+def test_bucket_queue():
+    queue = BucketQueue()
+    for priority, item in [(3, 30), (1, 10), (3, 31), (2, 20)]:
+        queue.push(priority, item)
+    assert len(queue) == 4
+    assert [queue.pop() for _ in range(4)] == [(1, 10), (2, 20), (3, 31), (3, 30)]
+    assert len(queue) == 0
+
+
+def test_search_grid():
+    # 0 1 2
+    # 3 # 5
+    # 6 7 8
+    neighbours = grid_neighbours(3, 3, {4})
+    for bucket in (False, True):
+        result = search([0], neighbours, 9, is_goal=lambda s: s == 8, bucket=bucket)
+        assert result.best_cost == 4
+        assert result.path(8)[0] == 0 and len(result.path(8)) == 5
+    result = search([0], neighbours, 9, is_goal=lambda s: s == 8, all_paths=True)
+    assert sorted(result.predecessors[8]) == [5, 7]
+    assert result.optimal_states() == {0, 1, 2, 5, 8, 3, 6, 7}
+    assert sorted(result.all_paths(8)) == [[0, 1, 2, 5, 8], [0, 3, 6, 7, 8]]
+
+
+def test_yield_search_states():
+    neighbours = grid_neighbours(3, 3, {4})
+    items = list(
+        iter_search(
+            [0], neighbours, 9, lambda s: s == 8, bucket=True, yield_search_states=True
+        )
+    )
+    result = items[-1]
+    assert isinstance(result, SearchResult)
+    assert items[-2][0] == 8
+    priorities = [priority for _, priority, *_ in items[:-1]]
+    assert priorities == sorted(priorities)
+    assert all(result.cost[s] == priority for s, priority, *_ in items[:-1])
+
+
+def test_search_unreachable():
+    result = search([0], grid_neighbours(3, 3, {1, 3}), 9, is_goal=lambda s: s == 8)
+    assert result.best_cost == inf
+    assert result.goal is None
+    assert result.cost[8] == inf
+
+
+def test_astar_matches_dijkstra():
+    R = C = 20
+    walls = {r * C + c for r in range(1, R - 1) for c in range(C) if (r * c) % 7 == 3}
+    neighbours = grid_neighbours(R, C, walls)
+
+    def manhattan(state):
+        r, c = divmod(state, C)
+        return R - 1 - r + C - 1 - c
+
+    goal = R * C - 1
+    plain = search([0], neighbours, R * C, is_goal=lambda s: s == goal)
+    astar = search([0], neighbours, R * C, lambda s: s == goal, manhattan, bucket=True)
+    assert plain.best_cost == astar.best_cost
+    assert len(astar.path(goal)) == astar.best_cost + 1
+    # a* should look at fewer states
+    assert sum(c < inf for c in astar.cost) <= sum(c < inf for c in plain.cost)
+
+
+def test_queue_benchmark():
+    import time
+
+    print()
+    R = C = 500
+    walls = {
+        r * C + c for r in range(R) for c in range(C) if (r * 31 + c * 17) % 11 == 0
+    }
+    walls.discard(0)
+    neighbours = grid_neighbours(R, C, walls)
+    costs = {}
+    for bucket in (False, True):
+        t0 = time.perf_counter()
+        result = search([0], neighbours, R * C, bucket=bucket)
+        t = time.perf_counter() - t0
+        costs[bucket] = result.cost
+        print(f"{'bucket' if bucket else 'heap'} queue: {t * 1000:.0f} ms")
+    assert costs[False] == costs[True]
@@ -1,15 +1,25 @@
-from typing import List
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from itertools import product
+from typing import List, Tuple
+from util.lazy import lazy_import
 
+np = lazy_import("numpy")
 
-class Segment1D:
-    """Represents an inclusive range of integers from a to b"""
+# builds a tuple subclass instance directly, skipping the python level __new__
+_new = tuple.__new__
 
-    def __init__(self, a: int, b: int):
-        self.a = a
-        self.b = b
+
+class Segment1D(namedtuple("Segment1D", ["a", "b"])):
+    """Represents an inclusive range of integers from a to b.
+    A tuple underneath: immutable, hashable, ordered by (a, b), no __dict__."""
+
+    __slots__ = ()
 
     def intersects(self, other: "Segment1D") -> bool:
-        return max(self.a, other.a) <= min(self.b, other.b)
+        a, b = self
+        c, d = other
+        return a <= d and c <= b
 
     def contains(self, other: "Segment1D") -> bool:
         return other.a >= self.a and other.b <= self.b
@@ -17,41 +27,65 @@ class Segment1D:
     def __str__(self) -> str:
         return f"[{self.a}, {self.b}]"
 
+    # methods below unpack the tuples once: that's faster than attribute access
+    # and return self instead of an equal new segment where they can
+
     def union(self, other: "Segment1D") -> "Segment1D":
-        if not self.intersects(other):
+        a, b = self
+        c, d = other
+        if a > d or c > b:
             raise ValueError(f"Segments {self} and {other} do not intersect")
-        return Segment1D(min(self.a, other.a), max(self.b, other.b))
+        if a <= c and d <= b:
+            return self
+        return _new(Segment1D, (a if a < c else c, b if b > d else d))
 
     def intersection(self, other: "Segment1D") -> "Segment1D":
-        if not self.intersects(other):
+        a, b = self
+        c, d = other
+        if a > d or c > b:
             raise ValueError(f"Segments {self} and {other} do not intersect")
-        return Segment1D(max(self.a, other.a), min(self.b, other.b))
+        if c <= a and b <= d:
+            return self
+        return _new(Segment1D, (a if a > c else c, b if b < d else d))
 
     def difference(self, other: "Segment1D") -> List["Segment1D"]:
-        if not self.intersects(other):
+        a, b = self
+        c, d = other
+        if a > d or c > b:
             return [self]
         result = []
-        if self.a < other.a:
-            result.append(Segment1D(self.a, other.a - 1))
-        if self.b > other.b:
-            result.append(Segment1D(other.b + 1, self.b))
+        if a < c:
+            result.append(_new(Segment1D, (a, c - 1)))
+        if b > d:
+            result.append(_new(Segment1D, (d + 1, b)))
         return result
 
+    def difference_into(self, other: "Segment1D", out: list) -> int:
+        """Like difference but appends the pieces to out instead of building
+        a new list, returns how many were added"""
+        a, b = self
+        c, d = other
+        if a > d or c > b:
+            out.append(self)
+            return 1
+        added = 0
+        if a < c:
+            out.append(_new(Segment1D, (a, c - 1)))
+            added += 1
+        if b > d:
+            out.append(_new(Segment1D, (d + 1, b)))
+            added += 1
+        return added
+
+    def shift(self, delta: int) -> "Segment1D":
+        return _new(Segment1D, (self.a + delta, self.b + delta))
+
     def __len__(self):
         return self.b - self.a + 1
 
-    def __lt__(self, other: "Segment1D"):
-        if self.a == other.a:
-            return self.b < other.b
-        return self.a < other.a
-
-    def __gt__(self, other: "Segment1D"):
-        if self.a == other.a:
-            return self.b > other.b
-        return self.a > other.a
-
-    def __eq__(self, other: "Segment1D"):
-        return self.a == other.a and self.b == other.b
+    def __bool__(self):
+        # without it truth would come from __len__, which raises when b < a - 1
+        return self.a <= self.b
 
     def __contains__(self, x: int):
         return self.a <= x <= self.b
@@ -59,59 +93,88 @@ class Segment1D:
     def __repr__(self):
         return f"Segment1D({self.a}, {self.b})"
 
-    def __hash__(self):
-        return hash((self.a, self.b))
-
 
 class Segment1DCollection:
-    """A collection of segments. Keeps segments sorted and defragmented."""
+    """A collection of segments. Keeps segments sorted and defragmented.
+    Segments are stored as sorted parallel lists of starts and ends
+    so that insertion, subtraction and membership use binary search."""
 
     def __init__(self, segments: List[Segment1D] = []):
-        self.segments: List[Segment1D] = []
-        for segment in segments:
-            self += segment
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        # sort once and sweep instead of inserting one by one
+        for segment in sorted(segments, key=lambda s: (s.a, s.b)):
+            if self.ends and segment.a <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], segment.b)
+            else:
+                self.starts.append(segment.a)
+                self.ends.append(segment.b)
+
+    def _overlapping(self, a: int, b: int) -> Tuple[int, int]:
+        """Range of indices of stored segments that intersect [a, b]"""
+        return bisect_left(self.ends, a), bisect_right(self.starts, b)
 
     def __add__(self, segment: Segment1D):
-        insert_index = -1
-        for i, s in enumerate(self.segments):
-            if s.intersects(segment):
-                combined = s.union(segment)
-                self.segments[i] = combined
-                insert_index = None
-                while i + 1 < len(self.segments) and self.segments[i + 1].intersects(
-                    combined
-                ):
-                    self.segments[i] = combined.union(self.segments[i + 1])
-                    self.segments.pop(i + 1)
-                break
-            elif s < segment:
-                insert_index = i
-            elif s > segment:
-                break
-        if insert_index is not None:
-            self.segments.insert(insert_index + 1, segment)
+        i, j = self._overlapping(segment.a, segment.b)
+        if i < j:
+            a = min(segment.a, self.starts[i])
+            b = max(segment.b, self.ends[j - 1])
+        else:
+            a, b = segment.a, segment.b
+        self.starts[i:j] = [a]
+        self.ends[i:j] = [b]
         return self
 
     def __subtract__(self, segment: Segment1D):
-        for i, s in enumerate(self.segments):
-            if s.intersects(segment):
-                diff = s.difference(segment)
-                self.segments[i] = diff[0]
-                if len(diff) > 1:
-                    self.segments.insert(i + 1, diff[1])
-                    break
-            elif s > segment:
-                break
+        i, j = self._overlapping(segment.a, segment.b)
+        if i == j:
+            return self
+        starts, ends = [], []
+        if self.starts[i] < segment.a:
+            starts.append(self.starts[i])
+            ends.append(segment.a - 1)
+        if self.ends[j - 1] > segment.b:
+            starts.append(segment.b + 1)
+            ends.append(self.ends[j - 1])
+        self.starts[i:j] = starts
+        self.ends[i:j] = ends
         return self
 
+    __sub__ = __subtract__
+
+    @property
+    def segments(self) -> List[Segment1D]:
+        return [Segment1D(a, b) for a, b in zip(self.starts, self.ends)]
+
     def __str__(self):
         return "(" + ", ".join(map(str, self.segments)) + ")"
 
     def __contains__(self, i: int):
-        return any(i in s for s in self.segments)
+        k = bisect_right(self.starts, i) - 1
+        return k >= 0 and self.ends[k] >= i
+
+    def contains_many(self, ids):
+        """Membership of many ids at once.
+        A numpy array gets a boolean array computed with searchsorted,
+        other sequences are sorted and checked in one pass over segments."""
+        if type(ids).__module__ == "numpy":
+            if not self.starts:
+                return np.zeros(len(ids), dtype=bool)
+            k = np.searchsorted(self.starts, ids, side="right") - 1
+            ends = np.asarray(self.ends)
+            return (k >= 0) & (ends[np.maximum(k, 0)] >= ids)
+        result = [False] * len(ids)
+        k = 0
+        n = len(self.starts)
+        for idx in sorted(range(len(ids)), key=ids.__getitem__):
+            x = ids[idx]
+            while k < n and self.ends[k] < x:
+                k += 1
+            result[idx] = k < n and self.starts[k] <= x
+        return result
 
     def __len__(self):
-        return sum(len(s) for s in self.segments)
+        return sum(self.ends) - sum(self.starts) + len(self.starts)
 
 
 def test_insert_segment_before():
@@ -150,16 +213,99 @@ def test_insert_segment_merge_both_small():
     assert c.segments[0] == Segment1D(10, 20)
 
 
-class Segment2D:
+def test_insert_segment_merge_many():
+    c = Segment1DCollection([Segment1D(1, 2), Segment1D(5, 6), Segment1D(9, 10)])
+    c += Segment1D(2, 9)
+    assert c.segments == [Segment1D(1, 10)]
+
+
+def test_subtract_segment():
+    c = Segment1DCollection([Segment1D(1, 5), Segment1D(8, 12), Segment1D(20, 30)])
+    c -= Segment1D(4, 9)
+    assert c.segments == [Segment1D(1, 3), Segment1D(10, 12), Segment1D(20, 30)]
+    c -= Segment1D(10, 12)
+    assert c.segments == [Segment1D(1, 3), Segment1D(20, 30)]
+    c -= Segment1D(22, 25)
+    assert c.segments == [Segment1D(1, 3), Segment1D(20, 21), Segment1D(26, 30)]
+
+
+def test_contains():
+    c = Segment1DCollection([Segment1D(3, 5), Segment1D(10, 14)])
+    ids = [1, 3, 5, 8, 11, 14, 32]
+    expected = [False, True, True, False, True, True, False]
+    assert [i in c for i in ids] == expected
+    assert c.contains_many(ids) == expected
+    assert c.contains_many(np.array(ids)).tolist() == expected
+
+
+def test_contains_many_empty():
+    c = Segment1DCollection()
+    assert c.contains_many(np.array([1, 2, 3])).tolist() == [False] * 3
+    assert c.contains_many([1, 2, 3]) == [False] * 3
+
+
+def test_fuzzy():
+    from random import randint
+
+    for _ in range(200):
+        c = Segment1DCollection()
+        points = set()
+        for _ in range(10):
+            a = randint(0, 50)
+            b = a + randint(0, 10)
+            if randint(0, 3):
+                c += Segment1D(a, b)
+                points.update(range(a, b + 1))
+            else:
+                c -= Segment1D(a, b)
+                points.difference_update(range(a, b + 1))
+        assert len(c) == len(points)
+        assert c.contains_many(list(range(-1, 62))) == [
+            i in points for i in range(-1, 62)
+        ]
+        assert all(a <= b for a, b in zip(c.starts, c.ends))
+        assert all(b < a for b, a in zip(c.ends, c.starts[1:]))
+
+
+def test_million_ranges_benchmark():
+    from random import randint
+    import time
+
+    n = 1_000_000
+    ranges = [
+        Segment1D(a, a + randint(0, 10**6))
+        for a in (randint(0, 10**12) for _ in range(n))
+    ]
+    ids = np.random.randint(0, 10**12, size=n)
+    t0 = time.perf_counter()
+    c = Segment1DCollection(ranges)
+    t1 = time.perf_counter()
+    for segment in ranges[:10000]:
+        c += segment
+    t2 = time.perf_counter()
+    fresh = c.contains_many(ids)
+    t3 = time.perf_counter()
+    print(
+        f"build {t1 - t0:.2f} s, 10k inserts {t2 - t1:.2f} s, "
+        f"1M queries {t3 - t2:.2f} s, {fresh.sum()} ids inside"
+    )
+    sample = ids[:1000].tolist()
+    assert fresh[:1000].tolist() == [i in c for i in sample]
+
+
+class Segment2D(namedtuple("Segment2D", ["x0", "x1", "y0", "y1"])):
     """Represents a rectangle with x in [x0,x1] and y in [y0,y1]"""
 
-    def __init__(self, x0, x1, y0, y1):
-        self.x0 = x0
-        self.x1 = x1
-        self.y0 = y0
-        self.y1 = y1
+    __slots__ = ()
 
     def difference(self, other: "Segment2D") -> List["Segment2D"]:
+        result = []
+        self.difference_into(other, result)
+        return result
+
+    def difference_into(self, other: "Segment2D", out: list) -> int:
+        """Like difference but appends the pieces to out instead of building
+        a new list, returns how many were added"""
         if (
             other.x0 > self.x1
             or other.x1 < self.x0
@@ -167,32 +313,341 @@ class Segment2D:
             or other.y1 < self.y0
         ):
             # if they don't intersect return initial rectangle
-            return [self]
-        # now start cutting
-        result = []
-        leftover = self
-        if other.x0 > leftover.x0:
+            out.append(self)
+            return 1
+        # now start cutting, the leftover rectangle is kept in plain ints
+        size = len(out)
+        x0, x1, y0, y1 = self
+        if other.x0 > x0:
             # right-hand part
-            result.append(
-                Segment2D(leftover.x0, other.x0 - 1, leftover.y0, leftover.y1)
-            )
-            leftover = Segment2D(other.x0, leftover.x1, leftover.y0, leftover.y1)
-        if other.x1 < leftover.x1:
+            out.append(_new(Segment2D, (x0, other.x0 - 1, y0, y1)))
+            x0 = other.x0
+        if other.x1 < x1:
             # left-hand part
-            result.append(
-                Segment2D(other.x1 + 1, leftover.x1, leftover.y0, leftover.y1)
-            )
-            leftover = Segment2D(leftover.x0, other.x1, leftover.y0, leftover.y1)
-        if other.y0 > leftover.y0:
+            out.append(_new(Segment2D, (other.x1 + 1, x1, y0, y1)))
+            x1 = other.x1
+        if other.y0 > y0:
             # top part
-            result.append(
-                Segment2D(leftover.x0, leftover.x1, leftover.y0, other.y0 - 1)
-            )
-            leftover = Segment2D(leftover.x0, leftover.x1, other.y0, leftover.y1)
-        if other.y1 < leftover.y1:
+            out.append(_new(Segment2D, (x0, x1, y0, other.y0 - 1)))
+            y0 = other.y0
+        if other.y1 < y1:
             # bottom part
-            result.append(
-                Segment2D(leftover.x0, leftover.x1, other.y1 + 1, leftover.y1)
-            )
+            out.append(_new(Segment2D, (x0, x1, other.y1 + 1, y1)))
             # leftover should be equal to other now, no need for it any more
+        return len(out) - size
+
+
+def test_segment_is_immutable_and_hashable():
+    import pytest
+
+    s = Segment1D(3, 7)
+    with pytest.raises(AttributeError):
+        s.a = 5
+    assert {s: 1}[Segment1D(3, 7)] == 1
+    assert len(s) == 5
+    assert 7 in s and 8 not in s
+    assert sorted([Segment1D(3, 9), Segment1D(1, 4), s]) == [(1, 4), (3, 7), (3, 9)]
+    assert s.shift(-3) == Segment1D(0, 4)
+    assert s.intersection(Segment1D(0, 10)) is s
+    assert not Segment1D(3, 2) and not Segment1D(3, 0) and Segment1D(3, 3)
+
+
+def test_difference_into():
+    out = [Segment1D(0, 0)]
+    assert Segment1D(3, 9).difference_into(Segment1D(5, 6), out) == 2
+    assert out == [(0, 0), (3, 4), (7, 9)]
+    assert Segment1D(3, 9).difference_into(Segment1D(0, 20), out) == 0
+    assert Segment1D(3, 9).difference_into(Segment1D(20, 30), out) == 1
+    assert out[-1] == (3, 9) and len(out) == 4
+    square, hole = Segment2D(0, 9, 0, 9), Segment2D(3, 5, 4, 6)
+    out = []
+    assert square.difference_into(hole, out) == 4
+    assert out == square.difference(hole)
+
+
+def test_segment2d_difference():
+    square = Segment2D(0, 9, 0, 9)
+    assert square.difference(Segment2D(20, 30, 0, 9)) == [square]
+    pieces = square.difference(Segment2D(3, 5, 4, 6))
+    assert sum((p.x1 - p.x0 + 1) * (p.y1 - p.y0 + 1) for p in pieces) == 100 - 9
+    assert pieces == [
+        Segment2D(0, 2, 0, 9),
+        Segment2D(6, 9, 0, 9),
+        Segment2D(3, 5, 0, 3),
+        Segment2D(3, 5, 7, 9),
+    ]
+
+
+def test_segment_benchmark():
+    import sys
+    import timeit
+
+    class DictSegment1D:
+        """Segment1D as it was before: a plain class with a per-instance __dict__"""
+
+        def __init__(self, a: int, b: int):
+            self.a = a
+            self.b = b
+
+        def intersects(self, other):
+            return max(self.a, other.a) <= min(self.b, other.b)
+
+        def intersection(self, other):
+            if not self.intersects(other):
+                raise ValueError(f"Segments {self} and {other} do not intersect")
+            return DictSegment1D(max(self.a, other.a), min(self.b, other.b))
+
+        def difference(self, other):
+            if not self.intersects(other):
+                return [self]
+            result = []
+            if self.a < other.a:
+                result.append(DictSegment1D(self.a, other.a - 1))
+            if self.b > other.b:
+                result.append(DictSegment1D(other.b + 1, self.b))
+            return result
+
+        def __lt__(self, other):
+            if self.a == other.a:
+                return self.b < other.b
+            return self.a < other.a
+
+        def __hash__(self):
+            return hash((self.a, self.b))
+
+    print()
+    sizes = {}
+    for cls in (DictSegment1D, Segment1D):
+        s, t = cls(10, 20), cls(15, 30)
+        size = sys.getsizeof(s) + sys.getsizeof(getattr(s, "__dict__", ()))
+        sizes[cls] = size
+        ops = {
+            "create": lambda: cls(10, 20),
+            "intersection": lambda: s.intersection(t),
+            "difference": lambda: s.difference(t),
+            "compare": lambda: s < t,
+            "hash": lambda: hash(s),
+        }
+        if cls is Segment1D:
+            out = []
+            ops["difference_into"] = lambda: s.difference_into(t, out) and out.clear()
+        n = 200_000
+        costs = ", ".join(
+            f"{name} {timeit.timeit(op, number=n) / n * 1e9:.0f} ns"
+            for name, op in ops.items()
+        )
+        print(f"{cls.__name__}: {size} bytes, {costs}")
+    assert sizes[Segment1D] < sizes[DictSegment1D]
+
+
+class SegmentND(namedtuple("SegmentND", ["lo", "hi"])):
+    """A box: product of inclusive integer ranges lo[i]..hi[i] in every dimension.
+    lo and hi are tuples so boxes are immutable and hashable like Segment1D."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_segments(cls, *segments: Segment1D) -> "SegmentND":
+        return _new(cls, (tuple(s.a for s in segments), tuple(s.b for s in segments)))
+
+    @property
+    def ndim(self) -> int:
+        return len(self.lo)
+
+    @property
+    def volume(self) -> int:
+        total = 1
+        for a, b in zip(*self):
+            total *= b - a + 1
+        return total
+
+    def segment(self, axis: int) -> Segment1D:
+        return _new(Segment1D, (self.lo[axis], self.hi[axis]))
+
+    def intersects(self, other: "SegmentND") -> bool:
+        return all(
+            a <= d and c <= b
+            for a, b, c, d in zip(self.lo, self.hi, other.lo, other.hi)
+        )
+
+    def contains(self, other: "SegmentND") -> bool:
+        return all(a <= c for a, c in zip(self.lo, other.lo)) and all(
+            b >= d for b, d in zip(self.hi, other.hi)
+        )
+
+    def __contains__(self, point) -> bool:
+        return all(a <= x <= b for a, x, b in zip(self.lo, point, self.hi))
+
+    def intersection(self, other: "SegmentND") -> "SegmentND":
+        lo = tuple(map(max, self.lo, other.lo))
+        hi = tuple(map(min, self.hi, other.hi))
+        if any(a > b for a, b in zip(lo, hi)):
+            raise ValueError(f"Boxes {self} and {other} do not intersect")
+        return _new(SegmentND, (lo, hi))
+
+    def split(self, axis: int, value: int):
+        """Cut the box into the part with coordinate < value along axis
+        and the part with coordinate >= value. Either part is None if empty."""
+        lo, hi = self
+        if value <= lo[axis]:
+            return None, self
+        if value > hi[axis]:
+            return self, None
+        below = _new(SegmentND, (lo, hi[:axis] + (value - 1,) + hi[axis + 1 :]))
+        above = _new(SegmentND, (lo[:axis] + (value,) + lo[axis + 1 :], hi))
+        return below, above
+
+    def difference(self, other: "SegmentND") -> List["SegmentND"]:
+        """Disjoint boxes covering the part of self outside of other.
+        Same cutting as Segment2D.difference: at most two slabs per dimension."""
+        if not self.intersects(other):
+            return [self]
+        result = []
+        lo, hi = list(self.lo), list(self.hi)
+        for axis, (c, d) in enumerate(zip(other.lo, other.hi)):
+            if c > lo[axis]:
+                result.append(
+                    _new(
+                        SegmentND,
+                        (tuple(lo), tuple(hi[:axis] + [c - 1] + hi[axis + 1 :])),
+                    )
+                )
+                lo[axis] = c
+            if d < hi[axis]:
+                result.append(
+                    _new(
+                        SegmentND,
+                        (tuple(lo[:axis] + [d + 1] + lo[axis + 1 :]), tuple(hi)),
+                    )
+                )
+                hi[axis] = d
+        # leftover is the intersection, it's not a part of the difference
         return result
+
+    def __str__(self) -> str:
+        return " x ".join(f"[{a}, {b}]" for a, b in zip(*self))
+
+
+class BoxSet:
+    """A union of boxes kept as disjoint boxes, so the volume is a plain sum.
+    Bounds live in (n, ndim) numpy arrays: finding boxes that overlap
+    a new one is a single vectorised comparison instead of a python loop."""
+
+    def __init__(self, ndim: int, boxes=()):
+        self.ndim = ndim
+        self.lo = np.empty((0, ndim), dtype=np.int64)
+        self.hi = np.empty((0, ndim), dtype=np.int64)
+        for box in boxes:
+            self.add(box)
+
+    def __len__(self) -> int:
+        return len(self.lo)
+
+    @property
+    def boxes(self) -> List[SegmentND]:
+        return [
+            _new(SegmentND, (tuple(lo), tuple(hi)))
+            for lo, hi in zip(self.lo.tolist(), self.hi.tolist())
+        ]
+
+    @property
+    def volume(self) -> int:
+        # python ints so that large boxes don't overflow int64 in the sum
+        return sum(int(v) for v in np.prod(self.hi - self.lo + 1, axis=1))
+
+    def _overlapping(self, box: SegmentND):
+        return np.all((self.lo <= box.hi) & (self.hi >= box.lo), axis=1)
+
+    def _cut(self, box: SegmentND, keep: List[SegmentND]):
+        """Remove box from the set, then append keep boxes"""
+        overlap = self._overlapping(box)
+        pieces = list(keep)
+        for lo, hi in zip(self.lo[overlap].tolist(), self.hi[overlap].tolist()):
+            pieces.extend(_new(SegmentND, (tuple(lo), tuple(hi))).difference(box))
+        rest = ~overlap
+        lo, hi = self.lo[rest], self.hi[rest]
+        if pieces:
+            lo = np.vstack([lo, np.array([p.lo for p in pieces], dtype=np.int64)])
+            hi = np.vstack([hi, np.array([p.hi for p in pieces], dtype=np.int64)])
+        self.lo, self.hi = lo, hi
+
+    def add(self, box: SegmentND):
+        self._cut(box, [box])
+
+    def subtract(self, box: SegmentND):
+        self._cut(box, [])
+
+    def __contains__(self, point) -> bool:
+        point = np.asarray(point)
+        return bool(np.any(np.all((self.lo <= point) & (self.hi >= point), axis=1)))
+
+
+def test_segmentnd_split():
+    box = SegmentND((1, 1, 1, 1), (4000, 4000, 4000, 4000))
+    below, above = box.split(2, 1351)
+    assert below == SegmentND((1, 1, 1, 1), (4000, 4000, 1350, 4000))
+    assert above == SegmentND((1, 1, 1351, 1), (4000, 4000, 4000, 4000))
+    assert below.volume + above.volume == box.volume == 4000**4
+    assert box.split(0, 1) == (None, box)
+    assert box.split(0, 4001) == (box, None)
+    assert box.segment(2) == Segment1D(1, 4000)
+
+
+def test_segmentnd_matches_segment2d():
+    square = Segment2D(0, 9, 0, 9)
+    hole = Segment2D(3, 5, 4, 6)
+    pieces = SegmentND((0, 0), (9, 9)).difference(SegmentND((3, 4), (5, 6)))
+    assert [(p.lo[0], p.hi[0], p.lo[1], p.hi[1]) for p in pieces] == square.difference(
+        hole
+    )
+
+
+def random_box(ndim, size):
+    from random import randint
+
+    lo, hi = [], []
+    for _ in range(ndim):
+        a, b = sorted((randint(0, size), randint(0, size)))
+        lo.append(a)
+        hi.append(b)
+    return SegmentND(tuple(lo), tuple(hi))
+
+
+def box_points(box):
+    return set(product(*(range(a, b + 1) for a, b in zip(*box))))
+
+
+def test_segmentnd_fuzzy():
+    from random import randint
+
+    for _ in range(200):
+        ndim = randint(1, 4)
+        s, t = random_box(ndim, 5), random_box(ndim, 5)
+        points, other = box_points(s), box_points(t)
+        assert s.intersects(t) == bool(points & other)
+        if points & other:
+            assert box_points(s.intersection(t)) == points & other
+        pieces = s.difference(t)
+        assert sum(p.volume for p in pieces) == len(points - other)
+        assert set().union(*map(box_points, pieces)) == points - other
+
+
+def test_boxset_fuzzy():
+    from random import randint
+
+    for _ in range(50):
+        ndim = randint(1, 3)
+        boxset = BoxSet(ndim)
+        points = set()
+        for _ in range(10):
+            box = random_box(ndim, 6)
+            if randint(0, 2):
+                boxset.add(box)
+                points |= box_points(box)
+            else:
+                boxset.subtract(box)
+                points -= box_points(box)
+            assert boxset.volume == len(points)
+        assert set().union(*map(box_points, boxset.boxes)) == points
+        for point in box_points(SegmentND((0,) * ndim, (6,) * ndim)):
+            assert (point in boxset) == (point in points)
@@ -2,7 +2,6 @@
 # Problem statement: https://adventofcode.com/2015/day/2
 
 from hashlib import md5
-import pytest
 
 day_title = "The Ideal Stocking Stuffer"
 
@@ -24,13 +23,11 @@ def part2(text_input):
     return find_number(text_input, "000000")
 
 
-@pytest.mark.slow
-def test_part1():
+def test_part1_slow():
     assert part1("abcdef") == 609043
     assert part1("pqrstuv") == 1048970
 
 
-@pytest.mark.slow
-def test_part2():
+def test_part2_slow():
     assert part2("abcdef") == 6742839
     assert part2("pqrstuv") == 5714438
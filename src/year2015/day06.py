@@ -1,8 +1,10 @@
 # Problem statement: https://adventofcode.com/2015/day/6
 
-import numpy as np
+from util.lazy import lazy_import
 import re
 
+np = lazy_import("numpy")
+
 day_title = "Probably a Fire Hazard"
 
 instruction_regex = re.compile(
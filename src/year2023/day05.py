@@ -2,6 +2,7 @@
 
 import re
 from typing import List
+from util.range_map import RangeMap
 from util.segments import Segment1D
 
 day_title = "If You Give A Seed A Fertilizer"
@@ -61,11 +62,9 @@ class TranslateRange:
         results = []
         leftovers = []
         if self.segment.intersects(segment):
-            transformed = self.segment.intersection(segment)
-            transformed.a += self.delta
-            transformed.b += self.delta
+            transformed = self.segment.intersection(segment).shift(self.delta)
             results.append(transformed)
-            leftovers.extend(segment.difference(self.segment))
+            segment.difference_into(self.segment, leftovers)
         else:
             leftovers.append(segment)
         return results, leftovers
@@ -119,6 +118,11 @@ class AlmanacMap:
                 notfound.append(segment)
         return transformed + notfound
 
+    def range_map(self) -> RangeMap:
+        return RangeMap.from_ranges(
+            (r.segment.a + r.delta, r.segment.a, len(r.segment)) for r in self.ranges
+        )
+
 
 def test_almanac_map_transform_point():
     r1 = TranslateRange(50, 98, 2)
@@ -161,18 +165,31 @@ def parse_input(text_input):
     return seeds, almanac, sequence
 
 
-def part1(text_input):
-    seeds, almanac, sequence = parse_input(text_input)
-    locations = []
-    for seed in seeds:
-        value = seed
-        a = "seed"
+def seed_to_location(almanac, sequence) -> RangeMap:
+    """All the almanac maps composed into one"""
+    result = RangeMap()
+    a = "seed"
+    while a != "location":
+        result = result.then(almanac[a].range_map())
+        a = sequence[a]
+    return result
+
+
+def test_seed_to_location():
+    _, almanac, sequence = parse_input(example_input)
+    mapp = seed_to_location(almanac, sequence)
+    for seed in range(120):
+        value, a = seed, "seed"
         while a != "location":
-            mapp = almanac[a]
+            value = almanac[a].transform_point(value)
             a = sequence[a]
-            value = mapp.transform_point(value)
-        locations.append(value)
-    return min(locations)
+        assert mapp(seed) == value
+
+
+def part1(text_input):
+    seeds, almanac, sequence = parse_input(text_input)
+    # a few dozen seeds: bisecting one by one beats importing numpy
+    return min(map(seed_to_location(almanac, sequence), seeds))
 
 
 def test_part_1():
@@ -184,15 +201,8 @@ def part2(text_input):
     todo = []
     for seed_start, seed_len in zip(seeds[0::2], seeds[1::2]):
         todo.append(Segment1D(seed_start, seed_start + seed_len - 1))
-
-    a = "seed"
-    while a != "location":
-        mapp = almanac[a]
-        todo = mapp.transform_ranges(todo)
-        a = sequence[a]
-
-    min_loc = min([segment.a for segment in todo])
-    return min_loc
+    locations = seed_to_location(almanac, sequence).map_segments(todo)
+    return min(segment.a for segment in locations)
 
 
 def test_part_2():
@@ -1,6 +1,8 @@
 # Problem statement: https://adventofcode.com/2023/day/13
 
-import numpy as np
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "Point of Incidence"
 
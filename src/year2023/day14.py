@@ -1,5 +1,10 @@
 # Problem statement: https://adventofcode.com/2023/day/14
 
+from util.cycles import fast_forward
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
+
 day_title = "Parabolic Reflector Dish"
 
 example_input = """
@@ -94,34 +99,169 @@ class TiltPlatform:
     def gist(self):
         return "\n".join("".join(line) for line in self.lines)
 
+    @property
+    def state(self):
+        return self.gist()
+
+    @state.setter
+    def state(self, gist):
+        self.lines = [list(line) for line in gist.split("\n")]
+
+    @staticmethod
+    def fingerprint(state):
+        return state
+
+
+class BitPlatform:
+    """Same as TiltPlatform with rounded and cube rocks in numpy bool arrays.
+    Between two cube rocks (or a cube rock and the edge) the rounded rocks of a
+    column or a row form a segment, tilting piles them up at one end of it.
+    Segments for every direction are found once, a tilt counts rocks
+    in every segment with one bincount and refills all segments at once."""
+
+    def __init__(self, text):
+        lines = text.split("\n")
+        self.R = len(lines)
+        self.C = len(lines[0])
+        chars = np.array([list(line) for line in lines])
+        self.rounds = chars == "O"
+        self.cubes = chars == "#"
+        # tilting north is tilting towards row 0 of the array,
+        # other directions do the same on a flipped or transposed view of it
+        views = {
+            "north": lambda a: a,
+            "south": lambda a: a[::-1],
+            "west": lambda a: a.T,
+            "east": lambda a: a.T[::-1],
+        }
+        self.segments = {
+            direction: self.find_segments(view) for direction, view in views.items()
+        }
+
+    def find_segments(self, view):
+        """Segment number of every cell and its distance from the start
+        of the segment when tilting towards row 0 of view(array)"""
+        cubes = view(self.cubes)
+        H = cubes.shape[0]
+        starts = np.ones_like(cubes)
+        # a cube rock is a segment of its own with no room for rounded rocks
+        starts[1:] = cubes[1:] | cubes[:-1]
+        # numbered column by column of the view
+        segment = np.cumsum(starts.T).reshape(starts.T.shape).T - 1
+        rows = np.arange(H)[:, None]
+        rank = rows - np.maximum.accumulate(np.where(starts, rows, 0), axis=0)
+        segment_full = np.empty((self.R, self.C), dtype=np.int64)
+        rank_full = np.empty((self.R, self.C), dtype=np.int64)
+        view(segment_full)[...] = segment
+        view(rank_full)[...] = np.where(cubes, H, rank)
+        return segment_full, rank_full, int(segment.max()) + 1
+
+    def roll(self, direction):
+        segment, rank, count = self.segments[direction]
+        rocks = np.bincount(segment[self.rounds], minlength=count)
+        self.rounds = rank < rocks[segment]
+        return self
+
+    def roll_north(self):
+        return self.roll("north")
+
+    def roll_south(self):
+        return self.roll("south")
 
-def part1(text_input):
-    platform = TiltPlatform(text_input)
+    def roll_east(self):
+        return self.roll("east")
+
+    def roll_west(self):
+        return self.roll("west")
+
+    def spin_cycle(self):
+        return self.roll_north().roll_west().roll_south().roll_east()
+
+    def calc_load(self):
+        return int(self.rounds.sum(axis=1) @ np.arange(self.R, 0, -1))
+
+    def gist(self):
+        chars = np.where(self.rounds, "O", np.where(self.cubes, "#", "."))
+        return "\n".join("".join(line) for line in chars)
+
+    @property
+    def state(self):
+        """Cube rocks never move, rounded rocks are all that changes.
+        Tilts make a new array so a state taken here is not changed by them."""
+        return self.rounds
+
+    @state.setter
+    def state(self, rounds):
+        self.rounds = rounds
+
+    @staticmethod
+    def fingerprint(rounds):
+        """Rounded rocks packed 8 to a byte"""
+        return np.packbits(rounds).tobytes()
+
+
+def part1(text_input, engine=BitPlatform):
+    platform = engine(text_input)
     platform.roll_north()
     return platform.calc_load()
 
 
-def part2(text_input):
-    platform = TiltPlatform(text_input)
-    last_seen = {}
-    period = 0
-    want = 1_000_000_000
-    for cycle in range(want):
-        gist = platform.spin_cycle().gist()
-        if gist in last_seen:
-            period = cycle - last_seen[gist]
-            break
-        else:
-            last_seen[gist] = cycle
-    todo = (want - cycle) % period - 1
-    for cycle in range(todo):
-        platform.spin_cycle()
+def part2(text_input, engine=BitPlatform):
+    platform = engine(text_input)
+
+    def spin(state):
+        platform.state = state
+        return platform.spin_cycle().state
+
+    _, platform.state = fast_forward(
+        spin, platform.state, 1_000_000_000, key=platform.fingerprint
+    )
     return platform.calc_load()
 
 
 def test_part1():
-    assert part1(example_input) == 136
+    for engine in (TiltPlatform, BitPlatform):
+        assert part1(example_input, engine) == 136
 
 
 def test_part2():
-    assert part2(example_input) == 64
+    for engine in (TiltPlatform, BitPlatform):
+        assert part2(example_input, engine) == 64
+
+
+def random_board(R, C, seed=14):
+    rng = np.random.default_rng(seed)
+    chars = rng.choice(list(".O#"), size=(R, C), p=[0.6, 0.3, 0.1])
+    return "\n".join("".join(line) for line in chars)
+
+
+def test_engines_agree():
+    board = random_board(23, 17)
+    slow, fast = TiltPlatform(board), BitPlatform(board)
+    assert fast.gist() == board
+    for roll in ("roll_north", "roll_east", "roll_west", "roll_south"):
+        getattr(slow, roll)()
+        getattr(fast, roll)()
+        assert fast.gist() == slow.gist()
+    for _ in range(5):
+        assert fast.spin_cycle().gist() == slow.spin_cycle().gist()
+        assert fast.calc_load() == slow.calc_load()
+
+
+def test_engines_benchmark():
+    import time
+
+    print()
+    for size, spins in ((100, 100), (1000, 3)):
+        board = random_board(size, size)
+        times = {}
+        for engine in (TiltPlatform, BitPlatform):
+            platform = engine(board)
+            t0 = time.perf_counter()
+            for _ in range(spins):
+                platform.fingerprint(platform.spin_cycle().state)
+            times[engine.__name__] = (time.perf_counter() - t0) / spins * 1000
+        print(
+            f"{size}x{size}, ms per spin cycle and fingerprint: "
+            + ", ".join(f"{name} {t:.2f}" for name, t in times.items())
+        )
@@ -1,7 +1,12 @@
 # Problem statement: https://adventofcode.com/2023/day/16
 
 from functools import cache
+from typing import Dict, Tuple
+from util.graphs import condensation, strongly_connected_components
 from util.inputs import movechars_dr_dc
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "The Floor Will Be Lava"
 
@@ -33,6 +38,8 @@ class MirrorsCave:
         self.lines = text.split("\n")
         self.R = len(self.lines)
         self.C = len(self.lines[0])
+        # bits of tiles (r, 0) in bitsets of tiles with bit r * C + c
+        self.column = sum(1 << (r * self.C) for r in range(self.R))
 
     @cache
     def process_beam(self, origin):
@@ -65,6 +72,91 @@ class MirrorsCave:
             origins.update(o for o in new_origins if o not in processed)
         return len(energized) - 1
 
+    def beam_segment(self, origin):
+        """Same beam as process_beam with its tiles on the grid as
+        (lowest bit, number of tiles, step between bits) for tile_bits"""
+        r, c, direction = origin
+        dr, dc = movechars_dr_dc[direction]
+        first = r, c
+        if not (0 <= r < self.R and 0 <= c < self.C):
+            first = r + dr, c + dc
+        newdirs = ""
+        while True:
+            r += dr
+            c += dc
+            if r < 0 or r >= self.R or c < 0 or c >= self.C:
+                break
+            newchar = self.lines[r][c]
+            if newchar != ".":
+                newdirs = direction_transforms[newchar][direction]
+                break
+        new_origins = [(r, c, newdir) for newdir in newdirs]
+        length = abs(r - first[0]) + abs(c - first[1])
+        # tiles go from first up to the one before (r, c)
+        lowest = min(first, (r - dr, c - dc))
+        step = self.C if dr else 1
+        return (lowest[0] * self.C + lowest[1], length, step), new_origins
+
+    def tile_bits(self, segment) -> int:
+        lowest, length, step = segment
+        if length == 0:
+            return 0
+        if step == 1:
+            return ((1 << length) - 1) << lowest
+        return (self.column & ((1 << (length - 1) * step + 1) - 1)) << lowest
+
+    def segments_bits(self, segments) -> int:
+        """Same as OR of tile_bits of segments. Every OR with a bitset as
+        long as the grid costs as much as the whole grid, a loop going round
+        the cave can have most segments in it so those are marked in an array"""
+        if len(segments) == 1:
+            return self.tile_bits(segments[0])
+        tiles = np.zeros(self.R * self.C, dtype=bool)
+        for lowest, length, step in segments:
+            tiles[lowest : lowest + length * step : step] = True
+        return int.from_bytes(np.packbits(tiles, bitorder="little").tobytes(), "little")
+
+    def energized_counts(self) -> Dict[Tuple[int, int, str], int]:
+        """count_energized_tiles for every one of iter_origins in one go.
+        Beam segments are nodes of a graph with edges to the segments they
+        turn or split into. Segments that lead to each other form strongly
+        connected components energizing the same tiles, the component's own
+        tiles and those of every component it leads to. Components come
+        sinks first, so tiles of the ones it leads to are ready by then
+        and get dropped when the last component leading to them is done."""
+        origins = list(self.iter_origins())
+        nodes = {origin: i for i, origin in enumerate(origins)}
+        segments, successors = [], []
+        todo = list(origins)
+        while len(segments) < len(todo):
+            segment, new_origins = self.beam_segment(todo[len(segments)])
+            segments.append(segment)
+            for origin in new_origins:
+                if origin not in nodes:
+                    nodes[origin] = len(todo)
+                    todo.append(origin)
+            successors.append([nodes[origin] for origin in new_origins])
+        components = strongly_connected_components(successors)
+        component_of, edges = condensation(successors, components)
+        waiting = [0] * len(components)
+        for targets in edges:
+            for target in targets:
+                waiting[target] += 1
+        energized, counts = {}, {}
+        for i, component in enumerate(components):
+            bits = self.segments_bits([segments[node] for node in component])
+            for target in edges[i]:
+                bits |= energized[target]
+                waiting[target] -= 1
+                if waiting[target] == 0:
+                    del energized[target]
+            if waiting[i]:
+                energized[i] = bits
+            else:
+                # nothing leads here, that's where origins are
+                counts[i] = bits.bit_count()
+        return {origin: counts[component_of[nodes[origin]]] for origin in origins}
+
     def iter_origins(self):
         for r in range(0, self.R):
             yield (r, -1, ">")
@@ -85,11 +177,7 @@ def part1(text_input):
 
 def part2(text_input):
     cave = MirrorsCave(text_input)
-    best = 0
-    for origin in cave.iter_origins():
-        cnt = cave.count_energized_tiles(origin)
-        best = max(best, cnt)
-    return best
+    return max(cave.energized_counts().values())
 
 
 def test_part1():
@@ -98,3 +186,39 @@ def test_part1():
 
 def test_part2():
     assert part2(example_input) == 51
+
+
+def random_cave(size, seed=16):
+    import random
+
+    rng = random.Random(seed)
+    chars = ["."] * 22 + list("\\/|-")
+    return "\n".join(
+        "".join(rng.choice(chars) for _ in range(size)) for _ in range(size)
+    )
+
+
+def test_energized_counts():
+    for text in (example_input, random_cave(15), random_cave(20, seed=3)):
+        cave = MirrorsCave(text)
+        counts = cave.energized_counts()
+        for origin in cave.iter_origins():
+            assert counts[origin] == cave.count_energized_tiles(origin)
+
+
+def test_energized_counts_benchmark():
+    import time
+
+    print()
+    for size in (110, 330, 1100):
+        text = random_cave(size)
+        t0 = time.perf_counter()
+        best = max(MirrorsCave(text).energized_counts().values())
+        t = time.perf_counter() - t0
+        line = f"{size}x{size}: graph {t:.2f} s"
+        if size < 1000:
+            cave = MirrorsCave(text)
+            t0 = time.perf_counter()
+            assert best == max(map(cave.count_energized_tiles, cave.iter_origins()))
+            line += f", flood from every origin {time.perf_counter() - t0:.2f} s"
+        print(line)
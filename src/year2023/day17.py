@@ -1,9 +1,9 @@
 # Problem statement: https://adventofcode.com/2023/day/17
 
+from util.grid import Grid
 from util.inputs import movechars_dr_dc
+from util.search import SearchResult, iter_search, search as best_first
 from collections import namedtuple
-import math
-import heapq
 
 
 State = namedtuple("State", ["cost", "r", "c", "direction", "path"])
@@ -36,107 +36,100 @@ example_input_1 = """
 
 
 class CrucibleCity:
+    # search states are flat grid index * 2 + 1 if the last move was horizontal
+
     def __init__(self, text_input, min_straight, max_straight):
-        self.costs = [[int(char) for char in line] for line in text_input.split("\n")]
-        self.R = len(self.costs)
-        self.C = len(self.costs[0])
+        self.grid = Grid(text_input)
+        self.R, self.C = self.grid.R, self.grid.C
+        # the border is negative so moves stop there
+        self.costs = [code - ord("0") for code in self.grid.tolist()]
         self.start = (0, 0)
-        self.min_cost = {}
         self.finish = (self.R - 1, self.C - 1)
+        self.finish_index = self.grid.index(*self.finish)
         self.min_straight = min_straight
         self.max_straight = max_straight
-        self.lower_bound_cost_to_finish = {}
-        self.lower_bound_queue = [(0, self.finish)]
-        heapq.heapify(self.lower_bound_queue)
-
-    def next_states(self, state: State):
+        up, right, down, left = self.grid.offsets
+        self.moves = {
+            0: [(down, "v"), (up, "^")],
+            1: [(right, ">"), (left, "<")],
+        }
+        self.lower_bound_cost_to_finish = self.collect_lower_bounds()
+
+    def next_states(self, state: int):
         # always turn here and explore all straight moves left/right
-        r0, c0, direction = state.r, state.c, state.direction
-        next_directions = "<>" if direction in "^v" else "^v"
-        for next_direction in next_directions:
-            dr, dc = movechars_dr_dc[next_direction]
+        index, horizontal = divmod(state, 2)
+        costs = self.costs
+        for step, _ in self.moves[1 - horizontal]:
             extra_cost = 0
-            extra_path = ""
             for i in range(1, self.max_straight + 1):
-                r, c = r0 + i * dr, c0 + i * dc
-                if r < 0 or r >= self.R:
-                    break
-                if c < 0 or c >= self.C:
+                index_i = index + i * step
+                if costs[index_i] < 0:
                     break
-                extra_path += next_direction
-                extra_cost += self.costs[r][c]
+                extra_cost += costs[index_i]
                 if i >= self.min_straight:
-                    min_cost = self.min_cost.get(
-                        (r, c, next_direction in "<>"), math.inf
-                    )
-                    if state.cost + extra_cost >= min_cost:
-                        continue
-                    self.min_cost[(r, c, next_direction in "<>")] = (
-                        state.cost + extra_cost
-                    )
-                    yield State(
-                        state.cost + extra_cost,
-                        r,
-                        c,
-                        next_direction,
-                        state.path + extra_path,
-                    )
-
-    def get_lower_bound_cost_to_finish(self, position):
-        current_cost = self.lower_bound_cost_to_finish.get(position, math.inf)
-        while (
-            len(self.lower_bound_queue) > 0
-            and current_cost >= self.lower_bound_queue[0][0]
-        ):
-            cost, pos = heapq.heappop(self.lower_bound_queue)
-            if pos == position:
-                current_cost = min(current_cost, cost)
-            cost_before = self.lower_bound_cost_to_finish.get(pos, math.inf)
-            if cost >= cost_before:
-                continue
-            self.lower_bound_cost_to_finish[pos] = cost
-            r0, c0 = pos
-            cost0 = self.costs[r0][c0]
-            for direction in "><v^":
-                dr, dc = movechars_dr_dc[direction]
-                r, c = r0 + dr, c0 + dc
-                if r < 0 or r >= self.R or c < 0 or c >= self.C:
-                    continue
-                cost_before = self.lower_bound_cost_to_finish.get((r, c), math.inf)
-                if cost + cost0 < cost_before:
-                    heapq.heappush(self.lower_bound_queue, (cost + cost0, (r, c)))
-        return current_cost
+                    yield index_i * 2 + 1 - horizontal, extra_cost
+
+    def collect_lower_bounds(self):
+        """Cost to finish from every cell if there were no limits on straight moves"""
+        costs, offsets = self.costs, self.grid.offsets
+
+        def reverse_moves(index):
+            # entering index costs its own value
+            for offset in offsets:
+                if costs[index + offset] >= 0:
+                    yield index + offset, costs[index]
+
+        result = best_first([self.finish_index], reverse_moves, len(costs), bucket=True)
+        return result.cost
+
+    def heuristic(self, state: int) -> int:
+        return self.lower_bound_cost_to_finish[state // 2]
+
+    def path(self, result: SearchResult, state: int) -> str:
+        """Move characters along the best path to state"""
+        path = ""
+        states = result.path(state)
+        for a, b in zip(states, states[1:]):
+            delta = b // 2 - a // 2
+            for step, char in self.moves[b % 2]:
+                if delta % step == 0 and delta // step > 0:
+                    path += char * (delta // step)
+                    break
+        return path
 
 
 def search(city: CrucibleCity, yield_search_states=False):
-    queue = [(0, State(0, *city.start, ">", "")), (0, State(0, *city.start, "v", ""))]
-    heapq.heapify(queue)
-    beststate = None
-    bestcost = math.inf
-    while len(queue) > 0:
-        priority, prev_state = heapq.heappop(queue)
-        lower_bound = prev_state.cost + city.get_lower_bound_cost_to_finish(
-            (prev_state.r, prev_state.c)
+    start = city.grid.index(*city.start)
+    finish = city.finish_index
+    for item in iter_search(
+        [start * 2, start * 2 + 1],
+        city.next_states,
+        len(city.costs) * 2,
+        is_goal=lambda state: state // 2 == finish,
+        heuristic=city.heuristic,
+        bucket=True,
+        yield_search_states=yield_search_states,
+    ):
+        if isinstance(item, SearchResult):
+            break
+        state, priority, result, queue_length = item
+        path = city.path(result, state)
+        yield (
+            State(
+                result.cost[state],
+                *city.grid.position(state // 2),
+                path[-1:] or ">",
+                path,
+            ),
+            priority,
+            result.best_cost,
+            queue_length,
         )
-        if lower_bound >= bestcost:
-            continue
-        if yield_search_states:
-            yield prev_state, priority, bestcost, len(queue)
-        for state in city.next_states(prev_state):
-            if (state.r, state.c) == city.finish:
-                if state.cost < bestcost:
-                    beststate = state
-                    bestcost = state.cost
-                    if yield_search_states:
-                        yield state, state.cost, bestcost, len(queue)
-            else:
-                dist = city.get_lower_bound_cost_to_finish((state.r, state.c))
-                lower_bound = state.cost + dist
-                if lower_bound >= bestcost:
-                    continue
-                priority = lower_bound
-                heapq.heappush(queue, (priority, state))
-    yield beststate, bestcost, bestcost, len(queue)
+    beststate = None
+    if item.goal is not None:
+        path = city.path(item, item.goal)
+        beststate = State(item.best_cost, *city.finish, path[-1], path)
+    yield beststate, item.best_cost, item.best_cost, 0
 
 
 def part1(text_input: str):
@@ -158,3 +151,15 @@ def test_part1():
 def test_part2():
     assert part2(example_input) == 94
     assert part2(example_input_1) == 71
+
+
+def test_best_path():
+    city = CrucibleCity(example_input, 1, 3)
+    beststate, *_ = next(search(city))
+    r, c, cost = 0, 0, 0
+    for char in beststate.path:
+        dr, dc = movechars_dr_dc[char]
+        r, c = r + dr, c + dc
+        cost += city.costs[city.grid.index(r, c)]
+    assert (r, c) == city.finish
+    assert cost == beststate.cost == 102
@@ -1,6 +1,6 @@
 # Problem statement: https://adventofcode.com/2023/day/19
 
-from util.segments import Segment1D
+from util.segments import Segment1D, SegmentND
 
 day_title = "Aplenty"
 
@@ -108,34 +108,34 @@ def total_combinations(parts):
     return total
 
 
+# part ranges are boxes with these axes
+AXES = {key: axis for axis, key in enumerate("xmas")}
+
+
 def part2(text_input: str):
     workflows, _ = parse_input(text_input)
-    parts = {
-        "a": Segment1D(1, 4000),
-        "x": Segment1D(1, 4000),
-        "s": Segment1D(1, 4000),
-        "m": Segment1D(1, 4000),
-    }
     total = 0
-    queue = [("in", parts)]
+    queue = [("in", SegmentND((1, 1, 1, 1), (4000, 4000, 4000, 4000)))]
     while len(queue) > 0:
-        workflow_key, parts = queue.pop()
+        workflow_key, box = queue.pop()
         if workflow_key == "A":
-            total += total_combinations(parts)
+            total += box.volume
             continue
         elif workflow_key == "R":
             continue
-        workflow = workflows[workflow_key]
-        destination = None
-        for step, data, send_to in workflow:
+        for step, data, send_to in workflows[workflow_key]:
             if step == "send":
-                destination = send_to
+                queue.append((send_to, box))
                 break
             property, comparison, value = data
-            yes_parts, no_parts = split_parts(parts, property, comparison, value)
-            queue.append((send_to, yes_parts))
-            parts = no_parts
-        queue.append((destination, parts))
+            if comparison == "<":
+                yes_box, box = box.split(AXES[property], value)
+            else:
+                box, yes_box = box.split(AXES[property], value + 1)
+            if yes_box is not None:
+                queue.append((send_to, yes_box))
+            if box is None:
+                break
     return total
 
 
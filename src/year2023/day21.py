@@ -1,8 +1,10 @@
 # Problem statement: https://adventofcode.com/2023/day/21
 
-import numpy as np
+from util.lazy import lazy_import
 from util.inputs import movechars_dr_dc
 
+np = lazy_import("numpy")
+
 day_title = "Step Counter"
 
 example_input = """
@@ -2,7 +2,9 @@
 
 from util.inputs import movechars_dr_dc
 import heapq
-import networkx as nx
+from util.lazy import lazy_import
+
+nx = lazy_import("networkx")
 
 day_title = "A Long Walk"
 
@@ -2,7 +2,9 @@
 
 from dataclasses import dataclass
 from util.segments import Segment1D
-from sympy import solve, Symbol
+from util.lazy import lazy_import
+
+sympy = lazy_import("sympy")
 
 epsilon = 1e-8
 
@@ -81,12 +83,12 @@ def part2(text_input):
     hailstones = [HailStone(line) for line in text_input.split("\n")]
 
     # variables to describe the position and velocity of the stone we throw
-    x = Symbol("x")
-    y = Symbol("y")
-    z = Symbol("z")
-    vx = Symbol("vx")
-    vy = Symbol("vy")
-    vz = Symbol("vz")
+    x = sympy.Symbol("x")
+    y = sympy.Symbol("y")
+    z = sympy.Symbol("z")
+    vx = sympy.Symbol("vx")
+    vy = sympy.Symbol("vy")
+    vz = sympy.Symbol("vz")
 
     equations = []
     # at the collision point with stone 1 the following equalities hold:
@@ -107,7 +109,7 @@ def part2(text_input):
             ]
         )
 
-    solution = solve(equations)[0]
+    solution = sympy.solve(equations)[0]
     return solution[x] + solution[y] + solution[z]
 
 
@@ -1,47 +1,37 @@
 # Problem statement: https://adventofcode.com/2024/day/4
 
+from util.grid import Grid
+
 day_title = "Ceres Search"
 
 
+def find_word(grid: Grid, word: str, dr: int, dc: int):
+    """Array of cells where word starts and goes in direction (dr, dc)"""
+    found = grid.cells == ord(word[0])
+    for i, char in enumerate(word[1:], 1):
+        found &= grid.shifted(i * dr, i * dc) == ord(char)
+    return found
+
+
 def part1(text_input: str) -> int:
-    lines = text_input.split("\n")
-    R, C = len(lines), len(lines[0])
+    grid = Grid(text_input, pad=3)
     xmas = 0
-    wanted = ("XMAS", "SAMX")
     steps = [(0, 1), (1, 0), (1, 1), (1, -1)]
-    for r in range(R):
-        for c in range(C):
-            if lines[r][c] not in "XS":
-                continue
-            for dr, dc in steps:
-                if (
-                    r + 3 * dr < 0
-                    or r + 3 * dr >= R
-                    or c + 3 * dc < 0
-                    or c + 3 * dc >= C
-                ):
-                    continue
-                word = "".join(lines[r + i * dr][c + i * dc] for i in range(4))
-                xmas += word in wanted
+    for dr, dc in steps:
+        for word in ("XMAS", "SAMX"):
+            xmas += int(find_word(grid, word, dr, dc).sum())
     return xmas
 
 
 def part2(text_input: str) -> int:
-    lines = text_input.split("\n")
-    R, C = len(lines), len(lines[0])
-    xmas = 0
-    wanted = ("MAS", "SAM")
-    diagonal_1 = ((-1, -1), (0, 0), (1, 1))
-    diagonal_2 = ((1, -1), (0, 0), (-1, 1))
-    for r in range(1, R - 1):
-        for c in range(1, C - 1):
-            if lines[r][c] != "A":
-                continue
-            word_1 = "".join(lines[r + dr][c + dc] for dr, dc in diagonal_1)
-            word_2 = "".join(lines[r + dr][c + dc] for dr, dc in diagonal_2)
-            if word_1 in wanted and word_2 in wanted:
-                xmas += 1
-    return xmas
+    grid = Grid(text_input)
+    m, s = ord("M"), ord("S")
+    diagonal_1 = (grid.shifted(-1, -1), grid.shifted(1, 1))
+    diagonal_2 = (grid.shifted(1, -1), grid.shifted(-1, 1))
+    xmas = grid.cells == ord("A")
+    for a, b in (diagonal_1, diagonal_2):
+        xmas &= ((a == m) & (b == s)) | ((a == s) & (b == m))
+    return int(xmas.sum())
 
 
 test_input = """
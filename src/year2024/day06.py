@@ -1,7 +1,13 @@
 # Problem statement: https://adventofcode.com/2024/day/6
 
+from array import array
 from collections import defaultdict
 from functools import cache
+from util.grid import Grid
+from util.lazy import lazy_import
+from util.parallel import map_reduce
+
+np = lazy_import("numpy")
 
 
 day_title = "Guard Gallivant"
@@ -11,23 +17,18 @@ class GuardGallivant:
     DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
 
     def __init__(self, text: str):
-        idx = text.index("^")
-        lines = text.split("\n")
-        self.R = len(lines)
-        self.C = len(lines[0])
-        self.r0 = idx // (self.C + 1)
-        self.c0 = idx % (self.C + 1)
+        grid = Grid(text)
+        self.R, self.C = grid.R, grid.C
+        self.r0, self.c0 = grid.find("^")
+        self.start = self.r0, self.c0
         self.direction = 0
         self.obstruction = None
 
         self.row_walls = defaultdict(list)
         self.col_walls = defaultdict(list)
-        for r in range(self.R):
-            for c in range(self.C):
-                if lines[r][c] != "#":
-                    continue
-                self.row_walls[r].append(c)
-                self.col_walls[c].append(r)
+        for r, c in grid.find_all("#"):
+            self.row_walls[r].append(c)
+            self.col_walls[c].append(r)
 
     @cache
     def next_wall(self, r0, c0, d):
@@ -114,26 +115,127 @@ def part1(text_input: str) -> int:
     return len(visited)
 
 
-def part2(text_input: str) -> int:
-    guard = GuardGallivant(text_input)
-    r0, c0 = guard.r0, guard.c0
-    visited = collect_visited(guard)
-    visited.remove((r0, c0))
-    loops = 0
-    for obstruction in visited:
-        guard.r0, guard.c0, guard.direction = r0, c0, 0
-        guard.obstruction = obstruction
+def makes_loop(guard: GuardGallivant, obstruction) -> bool:
+    """Does the guard walk in a loop from the start with obstruction added"""
+    guard.r0, guard.c0 = guard.start
+    guard.direction = 0
+    guard.obstruction = obstruction
+    seen = set()
+    while True:
+        _, _, r, c, direction, finished = guard.walk()
+        if finished:
+            return False
+        state = (r, c, direction)
+        if state in seen:
+            return True
+        seen.add(state)
+
+
+WALL, BORDER = ord("#"), ord(" ")
+
+
+class GuardJumps:
+    """The guard's walk as jumps between the points where it turns.
+    States are flat index * 4 + direction in a Grid with a border,
+    jump[state] is the state after walking up to the next wall and turning
+    right. If the guard walks off the map instead, leaves[state] is set."""
+
+    def __init__(self, text: str):
+        grid = Grid(text)
+        self.W = grid.W
+        self.cells = grid.flat.tobytes()
+        # same order as GuardGallivant.DIRECTIONS: up, right, down, left
+        self.offsets = grid.offsets
+        self.start = grid.index(*grid.find("^")) * 4
+        # going up is going towards row 0 of the padded array,
+        # other directions do the same on a flipped or transposed view of it
+        views = [
+            lambda a: a,
+            lambda a: a.T[::-1],
+            lambda a: a[::-1],
+            lambda a: a.T,
+        ]
+        index = np.arange(grid.array.size).reshape(grid.array.shape)
+        jump = np.empty((*grid.array.shape, 4), dtype=np.int64)
+        leaves = np.empty((*grid.array.shape, 4), dtype=bool)
+        for d, view in enumerate(views):
+            cells = view(grid.array)
+            blocked = (cells == WALL) | (cells == BORDER)
+            # the nearest wall or border cell above every cell
+            rows = np.arange(cells.shape[0])[:, None]
+            above = np.zeros(cells.shape, dtype=np.int64)
+            above[1:] = np.maximum.accumulate(np.where(blocked, rows, 0), axis=0)[:-1]
+            stop = np.take_along_axis(view(index), above + 1, axis=0)
+            view(jump[..., d])[...] = stop * 4 + (d + 1) % 4
+            view(leaves[..., d])[...] = (
+                np.take_along_axis(cells, above, axis=0) == BORDER
+            )
+        # indexing an array gives python ints without converting all of them
+        self.jump = array("q", jump.reshape(-1).tobytes())
+        self.leaves = bytearray(leaves.reshape(-1).tobytes())
+
+    def makes_loop(self, obstruction: int, state: int) -> bool:
+        """Does the guard walk in a loop from state with obstruction added.
+        The obstruction only changes jumps along its row and column that
+        would pass it, those are checked for as the guard goes instead of
+        making a patched copy of the table for every obstruction."""
+        jump, leaves, W = self.jump, self.leaves, self.W
+        # where the guard ends up after running into the obstruction
+        turns = [
+            (obstruction - offset) * 4 + (d + 1) % 4
+            for d, offset in enumerate(self.offsets)
+        ]
         seen = set()
         while True:
-            _, _, r, c, direction, finished = guard.walk()
-            if finished:
-                break
-            state = (r, c, direction)
-            if state in seen:
-                loops += 1
-                break
-            seen.add(state)
-    return loops
+            i, d = state >> 2, state & 3
+            stop = jump[state] >> 2
+            lo, hi = (i, stop) if i < stop else (stop, i)
+            # cells between lo and hi are in one row when going left or right
+            if lo <= obstruction <= hi and (d & 1 or (obstruction - i) % W == 0):
+                next_state = turns[d]
+            elif leaves[state]:
+                return False
+            else:
+                next_state = jump[state]
+            if next_state in seen:
+                return True
+            seen.add(next_state)
+            state = next_state
+
+    def candidates(self, from_start: bool = False):
+        """Cells on the guard's path to put an obstruction in, each with the
+        state to walk from: the state just before the guard first gets there,
+        the walk up to that point doesn't change with the obstruction.
+        With from_start every walk starts at the beginning."""
+        cells, offsets = self.cells, self.offsets
+        i, d = divmod(self.start, 4)
+        seen = {i}
+        found = []
+        while True:
+            ahead = i + offsets[d]
+            if cells[ahead] == BORDER:
+                return found
+            if cells[ahead] == WALL:
+                d = (d + 1) % 4
+                continue
+            if ahead not in seen:
+                seen.add(ahead)
+                found.append((ahead, self.start if from_start else i * 4 + d))
+            i = ahead
+
+    def position(self, index: int):
+        r, c = divmod(index, self.W)
+        return r - 1, c - 1
+
+
+def loops_with(jumps: GuardJumps, candidate) -> bool:
+    return jumps.makes_loop(*candidate)
+
+
+def part2(text_input: str, workers: int = 1, from_start: bool = False) -> int:
+    jumps = GuardJumps(text_input)
+    # every obstruction is tried on its own, workers get a copy of jumps
+    return map_reduce(loops_with, jumps, jumps.candidates(from_start), sum, workers)
 
 
 test_input = """
@@ -160,3 +262,78 @@ def test_part1():
 
 def test_part2():
     assert part2(test_input) == 6
+    assert part2(test_input, from_start=True) == 6
+    assert part2(test_input, workers=2) == 6
+
+
+def random_map(size, seed=6, walls=0.06):
+    import random
+
+    rng = random.Random(seed)
+    rows = [
+        ["#" if rng.random() < walls else "." for _ in range(size)] for _ in range(size)
+    ]
+    rows[size // 2][size // 2] = "^"
+    return "\n".join("".join(row) for row in rows)
+
+
+def walk_loops(text_input: str) -> set:
+    """Obstructions making loops found by GuardGallivant walking from the start"""
+    guard = GuardGallivant(text_input)
+    visited = collect_visited(guard)
+    visited.remove(guard.start)
+    return {cell for cell in visited if makes_loop(guard, cell)}
+
+
+def test_jumps_match_walking():
+    for seed in range(10):
+        text = random_map(30, seed)
+        jumps = GuardJumps(text)
+        expected = walk_loops(text)
+        for from_start in (False, True):
+            found = {
+                jumps.position(cell)
+                for cell, state in jumps.candidates(from_start)
+                if jumps.makes_loop(cell, state)
+            }
+            assert found == expected
+
+
+def test_part2_benchmark():
+    import time
+
+    print()
+    # maps where the guard walks a long way before leaving
+    for size, seed, walls in ((130, 57, 0.02), (400, 34, 0.01)):
+        text = random_map(size, seed, walls)
+        t0 = time.perf_counter()
+        expected = len(walk_loops(text))
+        line = f"{size}x{size}: GuardGallivant {time.perf_counter() - t0:.3f} s"
+        for from_start in (True, False):
+            t0 = time.perf_counter()
+            assert part2(text, workers=1, from_start=from_start) == expected
+            t = time.perf_counter() - t0
+            line += f", jumps from_start={from_start} {t:.3f} s"
+        print(line)
+
+
+def test_part2_workers_benchmark():
+    import time
+    from util.parallel import default_workers
+
+    print()
+    print(f"{default_workers()} cpus available")
+    for size, seed, walls in ((400, 34, 0.01), (1000, 27, 0.004)):
+        text = random_map(size, seed, walls)
+        times = {}
+        for workers in (1, 2, 4, 8):
+            t0 = time.perf_counter()
+            part2(text, workers=workers)
+            times[workers] = time.perf_counter() - t0
+        print(
+            f"{size}x{size}: "
+            + ", ".join(
+                f"{workers} workers {t:.3f} s (speedup {times[1] / t:.2f})"
+                for workers, t in times.items()
+            )
+        )
@@ -1,24 +1,24 @@
 # Problem statement: https://adventofcode.com/2024/day/8
 
 from collections import defaultdict
+from util.grid import Grid
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "Resonant Collinearity"
 
 
 class AntennaField:
     def __init__(self, text):
-        lines = text.split("\n")
-        self.R, self.C = len(lines), len(lines[0])
+        self.grid = Grid(text)
+        self.R, self.C = self.grid.R, self.grid.C
         self.antennas = defaultdict(list)
-        for r, line in enumerate(lines):
-            for c, char in enumerate(line):
-                if char != ".":
-                    self.antennas[char].append((r, c))
+        for r, c in np.argwhere(~self.grid.mask(".")).tolist():
+            self.antennas[self.grid[r, c]].append((r, c))
 
     def in_range(self, r: int, c: int) -> bool:
-        if r < 0 or c < 0 or r >= self.R or c >= self.C:
-            return False
-        return True
+        return self.grid.in_bounds(r, c)
 
     def find_antinodes(self, locations, single=True):
         antinodes = set()
@@ -1,42 +1,46 @@
 # Problem statement: https://adventofcode.com/2024/day/10
 
+from util.grid import Grid
+from util.parallel import map_reduce
+
 day_title = "Hoof It"
 
 
-# really need to implement some base class that does all these things
 class HikingMap:
-    DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
-
     def __init__(self, text):
-        self.lines = text.split("\n")
-        self.R, self.C = len(self.lines), len(self.lines[0])
+        self.grid = Grid(text)
+        self.R, self.C = self.grid.R, self.grid.C
+        # heights by flat index, the border is not a digit so trails stop there
+        self.heights = [code - ord("0") for code in self.grid.tolist()]
 
     def iter_points(self):
-        for r, line in enumerate(self.lines):
-            for c, char in enumerate(line):
-                yield r, c, int(char)
+        for r in range(self.R):
+            for c in range(self.C):
+                yield r, c, self.heights[self.grid.index(r, c)]
 
     def iter_neighbours(self, r, c):
-        for dr, dc in self.DIRECTIONS:
-            if r + dr >= self.R or r + dr < 0 or c + dc >= self.C or c + dc < 0:
-                continue
-            next_height = int(self.lines[r + dr][c + dc])
-            yield (r + dr, c + dc, next_height)
+        for dr, dc in self.grid.DIRECTIONS:
+            if self.grid.in_bounds(r + dr, c + dc):
+                yield (r + dr, c + dc, self.heights[self.grid.index(r + dr, c + dc)])
 
     def collect_trails(self, r0, c0):
-        if self.lines[r0][c0] != "0":
+        """Trails as tuples of flat indices"""
+        start = self.grid.index(r0, c0)
+        heights, offsets = self.heights, self.grid.offsets
+        if heights[start] != 0:
             raise ValueError("Not a valid trail starting point")
-        trails = [[(r0, c0, 0)]]
+        trails = [(start,)]
         done = set()
         while len(trails) > 0:
             trail = trails.pop()
-            r, c, height = trail[-1]
-            for rn, cn, hn in self.iter_neighbours(r, c):
-                if hn != height + 1:
+            i = trail[-1]
+            height = heights[i]
+            for offset in offsets:
+                if heights[i + offset] != height + 1:
                     continue
-                new_trail = [*trail, (rn, cn, hn)]
-                if hn == 9:
-                    done.add(tuple(new_trail))
+                new_trail = (*trail, i + offset)
+                if height == 8:
+                    done.add(new_trail)
                 else:
                     trails.append(new_trail)
         return done
@@ -50,22 +54,22 @@ class HikingMap:
         return len(trails)
 
 
-def part1(text_input: str) -> int:
+def score(hiking: HikingMap, trailhead) -> int:
+    return hiking.trailhead_score(*trailhead)
+
+
+def rating(hiking: HikingMap, trailhead) -> int:
+    return hiking.trailhead_rating(*trailhead)
+
+
+def part1(text_input: str, workers: int = 1) -> int:
     hiking = HikingMap(text_input)
-    score = 0
-    for r, c, height in hiking.iter_points():
-        if height == 0:
-            score += hiking.trailhead_score(r, c)
-    return score
+    return map_reduce(score, hiking, hiking.grid.find_all("0"), sum, workers)
 
 
-def part2(text_input: str) -> int:
+def part2(text_input: str, workers: int = 1) -> int:
     hiking = HikingMap(text_input)
-    rating = 0
-    for r, c, height in hiking.iter_points():
-        if height == 0:
-            rating += hiking.trailhead_rating(r, c)
-    return rating
+    return map_reduce(rating, hiking, hiking.grid.find_all("0"), sum, workers)
 
 
 test_input = """
@@ -90,3 +94,4 @@ def test_part1():
 
 def test_part2():
     assert part2(test_input) == 81
+    assert part2(test_input, workers=2) == 81
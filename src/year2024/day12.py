@@ -1,6 +1,7 @@
 # Problem statement: https://adventofcode.com/2024/day/12
 
 from collections import defaultdict
+from util.grid import Grid
 
 day_title = "Garden Groups"
 
@@ -31,49 +32,39 @@ class GardenRegion:
 
 
 class Farm:
-    DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
-
     def __init__(self, text):
-        self.lines = text.split("\n")
-        self.R, self.C = len(self.lines), len(self.lines[0])
+        self.grid = Grid(text)
+        self.R, self.C = self.grid.R, self.grid.C
         self.regions = []
 
-    def iter_points(self):
-        for r, line in enumerate(self.lines):
-            for c, char in enumerate(line):
-                yield r, c, char
-
-    def iter_neighbours(self, r, c):
-        for dr, dc in self.DIRECTIONS:
-            if r + dr >= self.R or r + dr < 0 or c + dc >= self.C or c + dc < 0:
-                yield (r + dr, c + dc, None)
-                continue
-            next_letter = self.lines[r + dr][c + dc]
-            yield (r + dr, c + dc, next_letter)
-
     def collect_regions(self):
-        done = set()
-        for r, c, letter in self.iter_points():
-            if (r, c) in done:
+        grid = self.grid
+        letters = grid.tolist()
+        border = letters[0]
+        done = bytearray(len(letters))
+        for start, letter in enumerate(letters):
+            if done[start] or letter == border:
                 continue
-            region = GardenRegion(r, c, letter)
+            region = GardenRegion(*grid.position(start), chr(letter))
             self.regions.append(region)
-            to_explore = set([(r, c)])
+            done[start] = 1
+            to_explore = [start]
             while len(to_explore) > 0:
-                rg, cg = to_explore.pop()
-                done.add((rg, cg))
-                for rn, cn, ln in self.iter_neighbours(rg, cg):
-                    if (rn, cn) in region.plots:
-                        continue
-                    if ln != region.letter:
+                i = to_explore.pop()
+                rg, cg = grid.position(i)
+                region.plots.add((rg, cg))
+                for offset in grid.offsets:
+                    n = i + offset
+                    if letters[n] != letter:
                         # save region's outer border locations
-                        if rn == rg:
-                            region.borders[("c", cg, cn - cg)].append(rg)
+                        if offset in (1, -1):
+                            region.borders[("c", cg, offset)].append(rg)
                         else:
-                            region.borders[("r", rg, rn - rg)].append(cg)
+                            region.borders[("r", rg, offset // grid.W)].append(cg)
                         continue
-                    region.plots.add((rn, cn))
-                    to_explore.add((rn, cn))
+                    if not done[n]:
+                        done[n] = 1
+                        to_explore.append(n)
 
 
 def part1(text_input: str) -> int:
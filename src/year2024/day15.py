@@ -1,47 +1,67 @@
 # Problem statement: https://adventofcode.com/2024/day/15
 
+from util.grid import Grid
 from util.inputs import movechars_dr_dc
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "Warehouse Woes"
 
 
+WALL, BOX, EMPTY, ROBOT, LEFT, RIGHT = map(ord, "#O.@[]")
+
+
 class Warehouse:
     def __init__(self, text: str):
-        self.lines = [list(line) for line in text.split("\n")]
-        self.R, self.C = len(self.lines), len(self.lines[0])
-        robot_index = text.index("@")
-        self.r0, self.c0 = robot_index // (self.C + 1), robot_index % (self.C + 1)
+        self.grid = Grid(text, border="#")
+        self.R, self.C = self.grid.R, self.grid.C
+        # the robot moves codes in a flat list, grid is updated when needed
+        self.cells = self.grid.tolist()
+        self.robot = self.grid.index(*self.grid.find("@"))
+        self.steps = {
+            char: dr * self.grid.W + dc for char, (dr, dc) in movechars_dr_dc.items()
+        }
+
+    @property
+    def r0(self):
+        return self.grid.position(self.robot)[0]
+
+    @property
+    def c0(self):
+        return self.grid.position(self.robot)[1]
+
+    @property
+    def lines(self):
+        self.grid.load(self.cells)
+        return self.grid.lines
 
     def maybe_move(self, movechar):
-        dr, dc = movechars_dr_dc[movechar]
-        moved = 0
-        r, c = self.r0 + dr, self.c0 + dc
-        while self.lines[r][c] == "O":
-            moved += 1
-            r += dr
-            c += dc
-        if self.lines[r][c] == "#":
+        step = self.steps[movechar]
+        cells = self.cells
+        i = self.robot + step
+        while cells[i] == BOX:
+            i += step
+        if cells[i] == WALL:
             return
-        while moved > 0:
-            self.lines[r][c] = "O"
-            r -= dr
-            c -= dc
-            moved -= 1
-        self.lines[r][c] = "@"
-        self.lines[self.r0][self.c0] = "."
-        self.r0 = r
-        self.c0 = c
+        if i != self.robot + step:
+            # the first box in a row goes to the free spot
+            cells[i] = BOX
+        cells[self.robot + step] = ROBOT
+        cells[self.robot] = EMPTY
+        self.robot += step
+
+    def calc_gps(self, box: str = "O"):
+        self.grid.load(self.cells)
+        rc = np.argwhere(self.grid.mask(box))
+        return int((100 * rc[:, 0] + rc[:, 1]).sum())
 
-    def calc_gps(self):
-        total = 0
-        for r, line in enumerate(self.lines):
-            for c, char in enumerate(line):
-                if char == "O":
-                    total += 100 * r + c
-        return total
+    def debug_str(self):
+        self.grid.load(self.cells)
+        return str(self.grid)
 
 
-class BigWarehouse:
+class BigWarehouse(Warehouse):
     def __init__(self, text: str):
         text = (
             text.replace("#", "##")
@@ -49,70 +69,50 @@ class BigWarehouse:
             .replace(".", "..")
             .replace("@", "@.")
         )
-        self.lines = [list(line) for line in text.split("\n")]
-        self.R, self.C = len(self.lines), len(self.lines[0])
-        robot_index = text.index("@")
-        self.r0, self.c0 = robot_index // (self.C + 1), robot_index % (self.C + 1)
+        super().__init__(text)
 
     def maybe_move_horizontal(self, movechar):
-        _, dc = movechars_dr_dc[movechar]
-        moved = 0
-        r, c = self.r0, self.c0 + dc
-        while self.lines[r][c] in "[]":
-            moved += 1
-            c += dc
-        if self.lines[r][c] == "#":
+        step = self.steps[movechar]
+        cells = self.cells
+        i = self.robot + step
+        while cells[i] == LEFT or cells[i] == RIGHT:
+            i += step
+        if cells[i] == WALL:
             return
-        while moved > 0:
-            self.lines[r][c] = "]" if dc > 0 else "["
-            c -= dc
-            self.lines[r][c] = "[" if dc > 0 else "]"
-            c -= dc
-            moved -= 2
-        self.lines[r][c] = "@"
-        self.lines[self.r0][self.c0] = "."
-        self.r0 = r
-        self.c0 = c
+        # shift the whole row of box halves and the robot by one cell
+        while i != self.robot:
+            cells[i] = cells[i - step]
+            i -= step
+        cells[self.robot] = EMPTY
+        self.robot += step
 
     def maybe_move_vertical(self, movechar):
-        dr, _ = movechars_dr_dc[movechar]
-        # collect boxes to push
-        # offsets are column offsets of what's moving at each row
-        offsets = [set([0])]
-        r, c0 = self.r0, self.c0
+        step = self.steps[movechar]
+        cells = self.cells
+        # collect what's moving at each row as flat indices
+        layers = [[self.robot]]
         while True:
-            r = r + dr
             # check for walls or boxes ahead
-            new_offsets = set()
-            for offset in offsets[-1]:
-                char = self.lines[r][c0 + offset]
-                if char == "#":
+            ahead = set()
+            for i in layers[-1]:
+                char = cells[i + step]
+                if char == WALL:
                     # wall, can't move
                     return
-                elif char == "[":
-                    new_offsets.add(offset)
-                    new_offsets.add(offset + 1)
-                elif char == "]":
-                    new_offsets.add(offset)
-                    new_offsets.add(offset - 1)
+                elif char == LEFT:
+                    ahead.update((i + step, i + step + 1))
+                elif char == RIGHT:
+                    ahead.update((i + step, i + step - 1))
             # no new boxes, we can move
-            if len(new_offsets) == 0:
+            if len(ahead) == 0:
                 break
-            # else we are undecided and continue the while loop
-            offsets.append(new_offsets)
-        # now we move the boxes
-        while len(offsets) > 1:
-            todo = offsets.pop()
-            for offset in sorted(todo)[::2]:
-                self.lines[r][c0 + offset] = "["
-                self.lines[r - dr][c0 + offset] = "."
-                self.lines[r][c0 + offset + 1] = "]"
-                self.lines[r - dr][c0 + offset + 1] = "."
-            r -= dr
-        # and now we move the robot
-        self.lines[r][c0] = "@"
-        self.lines[r - dr][c0] = "."
-        self.r0 = r
+            layers.append(ahead)
+        # now move the boxes starting from the farthest row, then the robot
+        for layer in reversed(layers):
+            for i in layer:
+                cells[i + step] = cells[i]
+                cells[i] = EMPTY
+        self.robot += step
 
     def maybe_move(self, movechar):
         if movechar in "^v":
@@ -121,15 +121,7 @@ class BigWarehouse:
             self.maybe_move_horizontal(movechar)
 
     def calc_gps(self):
-        total = 0
-        for r, line in enumerate(self.lines):
-            for c, char in enumerate(line):
-                if char == "[":
-                    total += 100 * r + c
-        return total
-
-    def debug_str(self):
-        return "\n".join("".join(line) for line in self.lines)
+        return super().calc_gps("[")
 
 
 def part1(text_input: str) -> int:
@@ -1,13 +1,13 @@
 # Problem statement: https://adventofcode.com/2024/day/16
 
-import heapq
 from collections import namedtuple
-from math import inf
-from typing import Iterator
+from util.grid import Grid
+from util.search import SearchResult, iter_search
 
 day_title = "Reindeer Maze"
 
 State = namedtuple("State", ["cost", "r", "c", "direction", "path"])
+WALL = ord("#")
 
 
 def parse_input(text_input: str):
@@ -19,132 +19,109 @@ class ReindeerMaze:
     DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
     def __init__(self, text: str):
-        self.lines = text.split("\n")
-        self.R, self.C = len(self.lines), len(self.lines[0])
-        start = text.index("S")
-        self.r0 = start // (self.C + 1)
-        self.c0 = start % (self.C + 1)
-        finish = text.index("E")
-        self.finish = (finish // (self.C + 1), finish % (self.C + 1))
+        self.grid = Grid(text, border="#")
+        self.R, self.C = self.grid.R, self.grid.C
+        self.cells = self.grid.tolist()
+        self.steps = self.grid.flat_offsets(self.DIRECTIONS)
+        self.r0, self.c0 = self.grid.find("S")
+        self.finish = self.grid.find("E")
+        self.finish_index = self.grid.index(*self.finish)
         self.direction = 1
-        self.lowest_cost_to_position = {}
-
-    def can_go_to(self, r: int, c: int) -> bool:
-        if r >= self.R or r < 0 or c >= self.C or c < 0:
-            return False
-        if self.lines[r][c] == "#":
-            return False
-        return True
-
-    def next_states(self, state: State) -> Iterator[State]:
-        # Go straight ahead until a wall or finish point
-        # At every location with a possible turn left of right yield turned state
-        # Skip states leading to already visited positions (if cost before was cheaper)
-        r, c, direction = state.r, state.c, state.direction
-        left = (direction + 1) % 4
-        right = (direction - 1) % 4
-        path = []
-        while True:
-            # look left, look right
-            for d in [left, right]:
-                dr, dc = self.DIRECTIONS[d]
-                if not self.can_go_to(r + dr, c + dc):
-                    continue
-                position = (r + dr, c + dc, d)
-                cost = state.cost + len(path) + 1001
-                cost_before = self.lowest_cost_to_position.get(position, inf)
-                if cost > cost_before:
-                    continue
-                self.lowest_cost_to_position[position] = cost
-                yield State(
-                    cost,
-                    *position,
-                    state.path + path + [(r + dr, c + dc)],
-                )
-            # go straight unless a wall or finish point
-            dr, dc = self.DIRECTIONS[direction]
-            if not self.can_go_to(r + dr, c + dc):
-                break
-            r += dr
-            c += dc
-            path.append((r, c))
-            if (r, c) == self.finish:
-                yield State(state.cost + len(path), r, c, direction, state.path + path)
+
+    @property
+    def lines(self):
+        return self.grid.lines
+
+    # search states are flat grid index * 4 + direction
+
+    def neighbours(self, state: int):
+        # Turn left or right if there's no wall that way
+        # and go straight ahead to the next place with a possible turn.
+        # Dead ends are skipped.
+        index, direction = divmod(state, 4)
+        cells, steps = self.cells, self.steps
+        left, right = steps[(direction + 1) % 4], steps[(direction - 1) % 4]
+        if cells[index + left] != WALL:
+            yield index * 4 + (direction + 1) % 4, 1000
+        if cells[index + right] != WALL:
+            yield index * 4 + (direction - 1) % 4, 1000
+        step = steps[direction]
+        cost = 0
+        while cells[index + step] != WALL:
+            index += step
+            cost += 1
+            if (
+                index == self.finish_index
+                or cells[index + left] != WALL
+                or cells[index + right] != WALL
+            ):
+                yield index * 4 + direction, cost
                 break
 
-    def min_cost_to_finish(self, state: State) -> int:
-        # If the maze had no walls the cost to finish would be this
-        r0, c0, direction = state.r, state.c, state.direction
-        r, c = self.finish
-        dr, dc = self.DIRECTIONS[direction]
-        delta_r, delta_c = r - r0, c - c0
-        if delta_r == 0 and delta_c == 0:
-            return 0
-        elif delta_r == 0:
-            return abs(delta_c) + (2000 if dc * delta_c < 0 else 0)
-        elif delta_c == 0:
-            return abs(delta_r) + (2000 if dr * delta_r < 0 else 0)
-        else:
-            # this is specific to finish being in top right corner
-            return abs(delta_r) + abs(delta_c) + (2000 if direction in (0, 3) else 1000)
+    def positions_between(self, state_a: int, state_b: int):
+        """Positions passed going from state a to state b, excluding a"""
+        a, b = state_a // 4, state_b // 4
+        step = self.steps[state_b % 4]
+        return (
+            [self.grid.position(i) for i in range(a + step, b + step, step)]
+            if a != b
+            else []
+        )
+
+    def min_cost_to_finish(self, state: int) -> int:
+        # If the maze had no walls and turns were free the cost would be this
+        r, c = self.grid.position(state // 4)
+        return abs(self.finish[0] - r) + abs(self.finish[1] - c)
+
+    def run_search(self, all_paths=False, yield_search_states=False):
+        finish = self.finish_index
+        return iter_search(
+            [self.grid.index(self.r0, self.c0) * 4 + self.direction],
+            self.neighbours,
+            len(self.cells) * 4,
+            is_goal=lambda state: state // 4 == finish,
+            heuristic=self.min_cost_to_finish,
+            all_paths=all_paths,
+            yield_search_states=yield_search_states,
+        )
+
+    def to_state(self, result: SearchResult, path) -> State:
+        positions = [self.grid.position(path[0] // 4)]
+        for a, b in zip(path, path[1:]):
+            positions.extend(self.positions_between(a, b))
+        return State(result.cost[path[-1]], *positions[-1], path[-1] % 4, positions)
 
     def search(self, yield_search_states=False):
-        start_state = State(0, self.r0, self.c0, self.direction, [(self.r0, self.c0)])
-        queue = [(0, start_state)]
-        beststates = []
-        bestcost = inf
-        iteration = 0
-        while len(queue) > 0:
-            iteration += 1
-            priority, previous_state = heapq.heappop(queue)
-            # if iteration % 1000 == 0:
-            #     print(
-            #         "best",
-            #         bestcost,
-            #         "iter",
-            #         iteration,
-            #         "prio",
-            #         priority,
-            #         "queue",
-            #         len(queue),
-            #         "cost",
-            #         previous_state.cost,
-            #         "path",
-            #         len(previous_state.path),
-            #         previous_state.path[-3:],
-            #     )
-            lower_bound = previous_state.cost + self.min_cost_to_finish(previous_state)
-            if lower_bound > bestcost:
-                continue
-            if yield_search_states:
-                yield previous_state, priority, bestcost, len(queue)
-            for state in self.next_states(previous_state):
-                if (state.r, state.c) == self.finish:
-                    if state.cost < bestcost:
-                        bestcost = state.cost
-                        beststates = [state]
-                        if yield_search_states:
-                            yield state, state.cost, bestcost, len(queue)
-                    elif state.cost == bestcost:
-                        if yield_search_states:
-                            yield state, state.cost, bestcost, len(queue)
-                        beststates.append(state)
-                else:
-                    dist = self.min_cost_to_finish(state)
-                    lower_bound = state.cost + dist
-                    if lower_bound > bestcost:
-                        continue
-                    priority = lower_bound
-                    heapq.heappush(queue, (priority, state))
-        yield beststates, bestcost, bestcost, 0
+        """Yields States with their paths for visualizations,
+        then a list of States of all the best paths"""
+        for item in self.run_search(True, yield_search_states):
+            if isinstance(item, SearchResult):
+                break
+            state, priority, result, queue_length = item
+            yield (
+                self.to_state(result, result.path(state)),
+                priority,
+                result.best_cost,
+                queue_length,
+            )
+        beststates = [
+            self.to_state(item, path)
+            for goal in item.goals
+            for path in item.all_paths(goal)
+        ]
+        yield beststates, item.best_cost, item.best_cost, 0
 
     def get_best_cost(self):
-        _, bestcost, *_ = next(self.search())
-        return bestcost
+        *_, result = self.run_search()
+        return result.best_cost
 
     def get_best_tiles_count(self):
-        beststates, *_ = next(self.search())
-        return len(set(pos for state in beststates for pos in state.path))
+        *_, result = self.run_search(all_paths=True)
+        tiles = {(self.r0, self.c0)}
+        for state in result.optimal_states():
+            for previous in result.predecessors[state]:
+                tiles.update(self.positions_between(previous, state))
+        return len(tiles)
 
 
 def part1(text_input: str) -> int:
@@ -196,31 +173,26 @@ test_input_2 = """
 """.strip()
 
 
-def test_next_states_1():
+def test_neighbours():
     maze = ReindeerMaze(test_input)
-    state = State(0, maze.r0, maze.c0, maze.direction, [(maze.r0, maze.c0)])
-    next_states = list(maze.next_states(state))
-    assert next_states == [
-        State(cost=1001, r=12, c=1, direction=2, path=[(13, 1), (12, 1)])
+    start = maze.grid.index(maze.r0, maze.c0) * 4 + maze.direction
+    # going east is a dead end, turning north is the only option
+    north = start + 1
+    assert list(maze.neighbours(start)) == [(north, 1000)]
+    # then go straight north to the next possible turn
+    assert list(maze.neighbours(north)) == [
+        (start, 1000),
+        (maze.grid.index(11, 1) * 4 + 2, 2),
     ]
 
 
-def test_next_states_2():
+def test_search_states():
     maze = ReindeerMaze(test_input)
-    state = State(cost=1001, r=12, c=1, direction=2, path=[(13, 1), (12, 1)])
-    next_states = list(maze.next_states(state))
-    assert next_states == [
-        State(
-            cost=2003, r=11, c=2, direction=1, path=[(13, 1), (12, 1), (11, 1), (11, 2)]
-        ),
-        State(
-            cost=2005,
-            r=9,
-            c=2,
-            direction=1,
-            path=[(13, 1), (12, 1), (11, 1), (10, 1), (9, 1), (9, 2)],
-        ),
-    ]
+    *_, (beststates, bestcost, *_) = maze.search(yield_search_states=True)
+    assert bestcost == 7036
+    assert all(state.path[-1] == maze.finish for state in beststates)
+    tiles = set(pos for state in beststates for pos in state.path)
+    assert len(tiles) == 45
 
 
 def test_part1():
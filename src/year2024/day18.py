@@ -1,17 +1,15 @@
 # Problem statement: https://adventofcode.com/2024/day/18
 
 from collections import namedtuple
-import heapq
-from typing import Iterator
-from math import inf, isinf
+from math import isinf
+from util.dsu import grid_first_disconnect
+from util.search import SearchResult, grid_neighbours, iter_search
 
 day_title = "RAM Run"
 State = namedtuple("State", ["cost", "r", "c"])
 
 
 class MemoryRegion:
-    DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-
     def __init__(self, text: str, finish=(70, 70), nwalls=1024):
         self.R, self.C = finish[0] + 1, finish[1] + 1
         self.r0 = 0
@@ -21,61 +19,41 @@ class MemoryRegion:
         for line in text.split()[:nwalls]:
             a, b = line.split(",")
             self.walls.add((int(a), int(b)))
-        self.lowest_cost_to_position = {}
-
-    def can_go_to(self, r: int, c: int) -> bool:
-        if r >= self.R or r < 0 or c >= self.C or c < 0:
-            return False
-        if (r, c) in self.walls:
-            return False
-        return True
-
-    def next_states(self, state: State) -> Iterator[State]:
-        r, c = state.r, state.c
-        for dr, dc in self.DIRECTIONS:
-            if not self.can_go_to(r + dr, c + dc):
-                continue
-            position = (r + dr, c + dc)
-            cost = state.cost + 1
-            cost_before = self.lowest_cost_to_position.get(position, inf)
-            if cost >= cost_before:
-                continue
-            self.lowest_cost_to_position[position] = cost
-            yield State(cost, *position)
-
-    def min_cost_to_finish(self, state: State) -> int:
+        # search states are cell numbers r * C + c
+        self.neighbours = grid_neighbours(
+            self.R, self.C, {r * self.C + c for r, c in self.walls}
+        )
+
+    def min_cost_to_finish(self, state: int) -> int:
         # ignore the obstacles
-        return abs(self.finish[0] - state.r) + abs(self.finish[1] - state.c)
+        r, c = divmod(state, self.C)
+        return abs(self.finish[0] - r) + abs(self.finish[1] - c)
 
     def search(self, yield_search_states=False):
-        start_state = State(0, self.r0, self.c0)
-        queue = [(0, start_state)]
-        bestcost = inf
+        finish = self.finish[0] * self.C + self.finish[1]
+        for item in iter_search(
+            [self.r0 * self.C + self.c0],
+            self.neighbours,
+            self.R * self.C,
+            is_goal=lambda state: state == finish,
+            heuristic=self.min_cost_to_finish,
+            bucket=True,
+            yield_search_states=yield_search_states,
+        ):
+            if isinstance(item, SearchResult):
+                break
+            state, priority, result, queue_length = item
+            position = divmod(state, self.C)
+            yield (
+                State(result.cost[state], *position),
+                priority,
+                result.best_cost,
+                queue_length,
+            )
         beststate = None
-        iteration = 0
-        while len(queue) > 0:
-            iteration += 1
-            priority, previous_state = heapq.heappop(queue)
-            lower_bound = previous_state.cost + self.min_cost_to_finish(previous_state)
-            if lower_bound > bestcost:
-                continue
-            if yield_search_states:
-                yield previous_state, priority, bestcost, len(queue)
-            for state in self.next_states(previous_state):
-                if (state.r, state.c) == self.finish:
-                    if state.cost < bestcost:
-                        bestcost = state.cost
-                        beststate = state
-                        if yield_search_states:
-                            yield state, state.cost, bestcost, len(queue)
-                else:
-                    dist = self.min_cost_to_finish(state)
-                    lower_bound = state.cost + dist
-                    if lower_bound >= bestcost:
-                        continue
-                    priority = lower_bound
-                    heapq.heappush(queue, (priority, state))
-        yield beststate, bestcost, bestcost, 0
+        if item.goal is not None:
+            beststate = State(item.best_cost, *self.finish)
+        yield beststate, item.best_cost, item.best_cost, 0
 
     def get_best_cost(self):
         _, bestcost, *_ = next(self.search())
@@ -88,19 +66,13 @@ def part1(text_input: str) -> int:
     return res
 
 
-def part2(text_input: str) -> int:
+def part2(text_input: str, finish=(70, 70)) -> str:
     lines = text_input.split()
-    a = 0
-    b = len(lines) - 1
-    while a < b:
-        m = (a + b) // 2
-        region = MemoryRegion(text_input, nwalls=m)
-        cost = region.get_best_cost()
-        if isinf(cost):
-            b = m
-        else:
-            a = m + 1
-    return lines[a - 1]
+    walls = [tuple(int(i) for i in line.split(",")) for line in lines]
+    index = grid_first_disconnect(finish[0] + 1, finish[1] + 1, walls, (0, 0), finish)
+    if index is None:
+        raise ValueError(f"No byte cuts the path to {finish}")
+    return lines[index]
 
 
 test_input = """
@@ -153,3 +125,11 @@ def test_part2():
         else:
             a = m + 1
     assert lines[a - 1] == "6,1"
+
+
+def test_part2_incremental():
+    import pytest
+
+    assert part2(test_input, finish=(6, 6)) == "6,1"
+    with pytest.raises(ValueError):
+        part2(test_input, finish=(9, 9))
@@ -1,48 +1,58 @@
 # Problem statement: https://adventofcode.com/2024/day/20
 
 from typing import Iterator
-import numpy as np
+from util.grid import Grid
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "Race Condition"
 
+WALL = ord("#")
+
 
 class RaceConditionMaze:
     DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
     def __init__(self, text: str):
-        self.lines = text.split("\n")
-        self.R, self.C = len(self.lines), len(self.lines[0])
-        # floats because nans are convenient for walls
-        self.distance = np.nan + np.zeros(shape=(self.R, self.C), dtype=np.float32)
-        start = text.index("S")
-        self.start = (start // (self.C + 1), start % (self.C + 1))
-        finish = text.index("E")
-        self.finish = (finish // (self.C + 1), finish % (self.C + 1))
+        self.grid = Grid(text, border="#")
+        self.R, self.C = self.grid.R, self.grid.C
+        self.cells = self.grid.tolist()
+        self.start = self.grid.find("S")
+        self.finish = self.grid.find("E")
         self.collect_distance()
         self.no_cheat_cost = int(self.distance[self.finish[0], self.finish[1]])
 
+    @property
+    def lines(self):
+        return self.grid.lines
+
     def iter_neighbours(self, point: tuple[int, int]) -> Iterator[tuple[int, int]]:
         r0, c0 = point
         for dr, dc in self.DIRECTIONS:
             r, c = r0 + dr, c0 + dc
-            if r >= self.R or r < 0 or c >= self.C or c < 0 or self.lines[r][c] == "#":
+            if self.cells[self.grid.index(r, c)] == WALL:
                 continue
             yield (r, c)
 
     # Used to be Dijkstra but since the maze has no junctions...
     # Just follow the corridor.
     def collect_distance(self):
-        r0, c0 = self.start
-        destination = self.finish
-        self.distance[r0, c0] = 0.0
-        cost = 0.0
-        while (r0, c0) != destination:
-            for r, c in self.iter_neighbours((r0, c0)):
-                if np.isnan(self.distance[r, c]):
-                    cost += 1.0
-                    self.distance[r, c] = cost
-                    r0, c0 = r, c
+        cells, offsets = self.cells, self.grid.offsets
+        i, finish = self.grid.index(*self.start), self.grid.index(*self.finish)
+        path = [i]
+        previous = None
+        while i != finish:
+            for offset in offsets:
+                if cells[i + offset] != WALL and i + offset != previous:
+                    previous, i = i, i + offset
+                    path.append(i)
                     break
+        # floats because nans are convenient for walls
+        distance = np.full(self.grid.array.shape, np.nan, dtype=np.float32)
+        distance.reshape(-1)[path] = np.arange(len(path))
+        p = self.grid.pad
+        self.distance = distance[p : p + self.R, p : p + self.C]
 
     def cheat_gains(self, cheat_steps=2, min_gain=1):
         total = 0
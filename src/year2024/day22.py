@@ -1,6 +1,8 @@
 # Problem statement: https://adventofcode.com/2024/day/22
 
-import numpy as np
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 day_title = "Monkey Market"
 
@@ -19,33 +21,47 @@ def part1(text_input: str) -> int:
     return numbers.sum()
 
 
-def part2(text_input):
+# sequences of 4 price changes from -9 to 9 are numbers in base 19
+WINDOWS = 19**4
+
+
+def prices_and_windows(numbers, steps=2000):
+    """For every buyer: the price after each window of 4 changes and the window"""
+    secrets = np.empty((len(numbers), steps + 1), dtype=np.int64)
+    secrets[:, 0] = numbers
+    for t in range(steps):
+        secrets[:, t + 1] = pseudorandom(secrets[:, t])
+    prices = (secrets % 10).astype(np.int32)
+    changes = np.diff(prices, axis=1) + 9
+    windows = changes[:, :-3] * 19**3
+    windows += changes[:, 1:-2] * 19**2
+    windows += changes[:, 2:-1] * 19
+    windows += changes[:, 3:]
+    return prices[:, 4:], windows
+
+
+def part2(text_input, chunk=1024):
     numbers = np.array([int(n) for n in text_input.split("\n")])
-    N = len(numbers)
-    sequences = -np.ones(shape=(N, 19, 19, 19, 19), dtype=np.int8)
-    changes = np.zeros(shape=(N, 4), dtype=np.int8)
-    last_price = numbers % 10
-    ci = 0
-    idx = np.arange(N)
-    for _ in range(4):
-        numbers = pseudorandom(numbers)
-        prices = numbers % 10
-        changes[:, ci] = prices - last_price + 9
-        ci = (ci + 1) % 4
-        last_price = prices
-    for _ in range(2000 - 4):
-        numbers = pseudorandom(numbers)
-        prices = numbers % 10
-        changes[:, ci] = prices - last_price + 9
-        ci = (ci + 1) % 4
-        last_price = prices
-        s1 = changes[:, ci]
-        s2 = changes[:, (ci + 1) % 4]
-        s3 = changes[:, (ci + 2) % 4]
-        s4 = changes[:, (ci + 3) % 4]
-        before = sequences[idx, s1, s2, s3, s4]
-        sequences[idx, s1, s2, s3, s4] = np.where(before == -1, prices, before)
-    return sequences.clip(0, None).sum(0).max()
+    # bananas for every window summed over buyers
+    totals = np.zeros(WINDOWS, dtype=np.int64)
+    # position of the first sale of a window for the current buyer, shared by
+    # all buyers and set back to the sentinel for the windows a buyer touched
+    sentinel = np.iinfo(np.int32).max
+    first = np.full(WINDOWS, sentinel, dtype=np.int32)
+    # buyers are done in chunks so memory does not grow with their number,
+    # small chunks spend more time stepping the pseudorandom numbers
+    for start in range(0, len(numbers), chunk):
+        prices, windows = prices_and_windows(numbers[start : start + chunk])
+        order = np.arange(windows.shape[1], dtype=np.int32)
+        for buyer_prices, buyer_windows in zip(prices, windows):
+            # a buyer sells at the first time a window shows up,
+            # minimum.at keeps the smallest position of repeated windows
+            np.minimum.at(first, buyer_windows, order)
+            sold = first[buyer_windows] == order
+            first[buyer_windows] = sentinel
+            # windows that are sold are unique so += adds every one of them
+            totals[buyer_windows[sold]] += buyer_prices[sold]
+    return int(totals.max())
 
 
 test_input = """
@@ -76,3 +92,54 @@ def test_part1():
 
 def test_part2():
     assert part2(test_input_2) == 23
+
+
+def test_first_window_is_sold():
+    # prices of 123 are 3 0 6 5 4 4 6 4 4 2, the first window -3,6,-1,-1
+    # ends at price 4 and can be sold there
+    prices, windows = prices_and_windows(np.array([123]), steps=9)
+    assert prices[0].tolist() == [4, 4, 6, 4, 4, 2]
+    assert windows[0][0] == (-3 + 9) * 19**3 + (6 + 9) * 19**2 + 8 * 19 + 8
+
+
+def test_part2_reference():
+    numbers = [1, 2, 3, 2024, 123, 99999]
+    totals = {}
+    for n in numbers:
+        prices = [n % 10]
+        for _ in range(2000):
+            n = pseudorandom(n)
+            prices.append(n % 10)
+        changes = [b - a for a, b in zip(prices, prices[1:])]
+        seen = set()
+        for t in range(4, len(prices)):
+            window = tuple(changes[t - 4 : t])
+            if window not in seen:
+                seen.add(window)
+                totals[window] = totals.get(window, 0) + prices[t]
+    assert part2("\n".join(map(str, numbers))) == max(totals.values())
+
+
+def test_part2_chunks():
+    numbers = "\n".join(str(n) for n in range(1, 40))
+    expected = part2(numbers)
+    for chunk in (1, 7, 100):
+        assert part2(test_input_2, chunk=chunk) == 23
+        assert part2(numbers, chunk=chunk) == expected
+
+
+def test_part2_benchmark():
+    import time
+    import tracemalloc
+
+    print()
+    rng = np.random.default_rng(22)
+    numbers = "\n".join(map(str, rng.integers(1, 16777216, size=100_000)))
+    for chunk in (256, 1024, 4096):
+        t0 = time.perf_counter()
+        tracemalloc.start()
+        part2(numbers, chunk=chunk)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        t = time.perf_counter() - t0
+        print(f"100k buyers, chunk {chunk}: {t:.1f} s, peak {peak / 2**20:.0f} MiB")
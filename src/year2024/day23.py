@@ -1,7 +1,9 @@
 # Problem statement: https://adventofcode.com/2024/day/23
 
-import networkx as nx
 from collections import defaultdict
+from util.lazy import lazy_import
+
+nx = lazy_import("networkx")
 
 day_title = "LAN Party"
 
@@ -11,7 +11,7 @@ def part1(text_input: str) -> int:
     for r in ranges.split():
         a, b = r.split("-")
         fresh += Segment1D(int(a), int(b))
-    return sum(int(id) in fresh for id in ids.split())
+    return sum(fresh.contains_many([int(id) for id in ids.split()]))
 
 
 def part2(text_input: str) -> int:
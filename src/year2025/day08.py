@@ -1,60 +1,83 @@
 # Problem statement: https://adventofcode.com/2025/day/8
 
-from itertools import combinations
-import numpy as np
-from scipy.spatial.distance import pdist
+import heapq
 from io import StringIO
+from util.dsu import DisjointSet
+from util.lazy import lazy_import
 
-day_title = "Playground"
-
+np = lazy_import("numpy")
+spatial = lazy_import("scipy.spatial")
 
-def get_sorted_pairs(boxes):
-    distances = pdist(boxes, metric="euclidean")
-    idx = np.argsort(distances)
-    pairs = list(combinations(range(len(boxes)), 2))
-    for i in idx:
-        yield pairs[i]
+day_title = "Playground"
 
 
-# The connection logic can probably be much more efficient...
+def more_neighbours(tree, box, distances, neighbours, k):
+    """Query the k nearest neighbours of box and add the ones not used yet
+    to the used up distances and neighbours. Neighbours at the same distance can come in any order and a larger query
+    can pick others of them, so the new ones that tie with the last one used
+    are told apart by index."""
+    new_distances, new_neighbours = tree.query(box, k=k)
+    last = distances[-1]
+    used = neighbours[distances == last]
+    new = (new_distances > last) | (
+        (new_distances == last) & ~np.isin(new_neighbours, used)
+    )
+    return (
+        np.concatenate([distances, new_distances[new]]),
+        np.concatenate([neighbours, new_neighbours[new]]),
+    )
+
+
+def get_sorted_pairs(boxes, k=16):
+    """Pairs of box indices (i, j), i < j, in order of increasing distance.
+    A heap holds the next unused nearest neighbour of every box. Neighbours
+    come from a KD-tree k at a time, so nothing of size N^2 is ever built."""
+    n = len(boxes)
+    tree = spatial.cKDTree(boxes)
+    distances, neighbours = tree.query(boxes, k=min(k, n))
+    # (distance, i, j, rank of j among neighbours of i)
+    queue = [
+        (d[0], i, nb[0], 0) for i, (d, nb) in enumerate(zip(distances, neighbours))
+    ]
+    heapq.heapify(queue)
+    distances, neighbours = list(distances), list(neighbours)
+    while queue:
+        _, i, j, rank = heapq.heappop(queue)
+        # every pair comes up twice, as (i, j) and as (j, i)
+        if i < j:
+            yield i, int(j)
+        rank += 1
+        if rank == n:
+            continue
+        if rank == len(neighbours[i]):
+            # used up the neighbours we had, fetch twice as many
+            distances[i], neighbours[i] = more_neighbours(
+                tree, boxes[i], distances[i], neighbours[i], min(2 * rank, n)
+            )
+        heapq.heappush(queue, (distances[i][rank], i, neighbours[i][rank], rank))
 
 
 def part1(text_input: str, count=1000) -> int:
     boxes = np.loadtxt(StringIO(text_input), delimiter=",", dtype=np.int64)
     pairs = get_sorted_pairs(boxes)
     # connect pairs of boxes
-    connections = {i: {i} for i in range(len(boxes))}
+    circuits = DisjointSet(len(boxes))
     for n, (i, j) in enumerate(pairs):
-        conn = connections[i]
-        conn.update(connections[j])
-        for b in conn:
-            connections[b] = conn
+        circuits.union(i, j)
         if n == count - 1:
             break
-    sizes = []
-    # get connected component sizes
-    while connections:
-        i, boxes = connections.popitem()
-        sizes.append(len(boxes))
-        boxes.remove(i)
-        for b in boxes:
-            connections.pop(b)
-    sizes.sort(reverse=True)
-    return sizes[0] * sizes[1] * sizes[2]
+    a, b, c = circuits.largest(3)
+    return a * b * c
 
 
 def part2(text_input: str) -> int:
     boxes = np.loadtxt(StringIO(text_input), delimiter=",", dtype=np.int64)
     pairs = get_sorted_pairs(boxes)
     # connect until all in
-    connections = {i: {i} for i in range(len(boxes))}
-    for _, (i, j) in enumerate(pairs):
-        conn = connections[i]
-        conn.update(connections[j])
-        if len(conn) == len(boxes):
+    circuits = DisjointSet(len(boxes))
+    for i, j in pairs:
+        if circuits.union(i, j) and circuits.components == 1:
             return boxes[i][0] * boxes[j][0]
-        for b in conn:
-            connections[b] = conn
 
 
 test_input = """
@@ -87,3 +110,28 @@ def test_part1():
 
 def test_part2():
     assert part2(test_input) == 25272
+
+
+def test_sorted_pairs():
+    boxes = np.loadtxt(StringIO(test_input), delimiter=",", dtype=np.int64)
+    pairs = list(get_sorted_pairs(boxes, k=2))
+    assert len(pairs) == len(set(pairs)) == len(boxes) * (len(boxes) - 1) // 2
+    d = [np.linalg.norm(boxes[i] - boxes[j]) for i, j in pairs]
+    assert d == sorted(d)
+
+
+def test_sorted_pairs_with_ties():
+    import itertools
+    import random
+
+    lattice = np.array(list(itertools.product(range(6), repeat=3)))
+    pairs = list(get_sorted_pairs(lattice))
+    assert len(set(pairs)) == len(pairs) == len(lattice) * (len(lattice) - 1) // 2
+    for _ in range(50):
+        # small coordinates give many equal distances and duplicate boxes
+        n = random.randint(2, 60)
+        boxes = np.array([[random.randint(0, 3) for _ in range(3)] for _ in range(n)])
+        pairs = list(get_sorted_pairs(boxes, k=random.randint(2, 4)))
+        assert sorted(pairs) == list(itertools.combinations(range(n), 2))
+        d = [np.linalg.norm(boxes[i] - boxes[j]) for i, j in pairs]
+        assert d == sorted(d)
@@ -1,8 +1,10 @@
 # Problem statement: https://adventofcode.com/2025/day/9
 
-import numpy as np
+from util.lazy import lazy_import
 from io import StringIO
 
+np = lazy_import("numpy")
+
 day_title = "Movie Theater"
 
 
@@ -2,8 +2,10 @@
 
 import re
 from collections import deque
-from scipy.optimize import linprog
-import numpy as np
+from util.lazy import lazy_import
+
+np = lazy_import("numpy")
+optimize = lazy_import("scipy.optimize")
 
 day_title = "Factory"
 
@@ -42,7 +44,7 @@ def configure_joltages(buttons: list[set[int]], joltages: tuple[int]):
     A_eq = np.zeros((len(joltages), len(buttons)))
     for b, button in enumerate(buttons):
         A_eq[list(button), b] = 1
-    res = linprog(c, A_eq=A_eq, b_eq=joltages, integrality=1)
+    res = optimize.linprog(c, A_eq=A_eq, b_eq=joltages, integrality=1)
     return int(res.x.sum())
 
 